@@ -1,59 +1,75 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, validator
-from typing import Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import hmac
 import logging
-import base64
+import mmap
+import orjson
+from collections import OrderedDict
 
-from ..services.bitstream_service import BitstreamService
+from ..services import get_bitstream_service
+from ..config import INTERNAL_API_TOKEN
+from .codec import b64decode, b64encode_as_string
+from .executor import run_blocking
+from .routing import ORJSONRoute
+from .fields import (
+    NonEmptyStr, PayloadStr, ModuleName, DeviceFamily, DataFormat,
+    VALID_FAMILIES, VALID_FORMATS, MODULE_NAME_RE
+)
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse, route_class=ORJSONRoute)
 
 # Initialize bitstream service
-bitstream_service = BitstreamService()
+bitstream_service = get_bitstream_service()
+
+# Supported devices are fixed once the service is built, so serialize them once
+DEVICES_JSON = orjson.dumps({"supported_devices": bitstream_service.supported_devices})
+HEALTH_JSON = orjson.dumps({
+    "status": "healthy",
+    "service": "bitstream",
+    "supported_families": list(bitstream_service.supported_devices.keys())
+})
+
+# Dashboards poll /info with the same blob, so keep the most recent results
+# instead of decoding and checksumming it on every call
+RESULT_CACHE_SIZE = 64
+_info_cache: OrderedDict = OrderedDict()
+
+def _release_bitstream(bitstream_file) -> None:
+    """Unmap a bitstream handed back by the service as an mmap"""
+    if isinstance(bitstream_file, mmap.mmap):
+        bitstream_file.close()
+
+def _encode_bitstream_file(results: Dict[str, Any]) -> None:
+    """Replace the raw bitstream in results with its base64 text"""
+    bitstream_file = results.pop('bitstream_file', None)
+    if bitstream_file is not None:
+        # One call straight into the result string; the bitstream may be an mmap
+        results['bitstream_file_b64'] = b64encode_as_string(bitstream_file)
+        _release_bitstream(bitstream_file)
+
+# Chunk size used when streaming a mapped bitstream in /generate/raw
+RAW_CHUNK_SIZE = 1 << 20
+
+def _iter_bitstream(bitstream_file):
+    """Yield a mapped bitstream in chunks, unmapping it once sent"""
+    try:
+        for offset in range(0, len(bitstream_file), RAW_CHUNK_SIZE):
+            yield bitstream_file[offset:offset + RAW_CHUNK_SIZE]
+    finally:
+        _release_bitstream(bitstream_file)
 
 # Request/Response models
 class BitstreamRequest(BaseModel):
-    implementation_data: str
-    top_module: str
-    device_family: str
-    device_part: str
-    data_format: str = 'fasm'
-
-    @validator('implementation_data')
-    def validate_implementation_data(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Implementation data cannot be empty")
-        return v.strip()
-
-    @validator('top_module')
-    def validate_top_module(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Top module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Top module name must be a valid Verilog identifier")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
-
-    @validator('data_format')
-    def validate_data_format(cls, v):
-        valid_formats = ['fasm', 'asc', 'config']
-        if v not in valid_formats:
-            raise ValueError(f"Data format must be one of: {valid_formats}")
-        return v
+    implementation_data: PayloadStr
+    top_module: ModuleName
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
+    data_format: DataFormat = 'fasm'
 
 class BitstreamResponse(BaseModel):
     success: bool
@@ -63,6 +79,15 @@ class BitstreamResponse(BaseModel):
     device_part: str
     top_module: str
 
+# Targets accepted by one /generate/batch request
+MAX_BATCH_JOBS = 16
+
+class BitstreamBatchRequest(BaseModel):
+    jobs: List[BitstreamRequest] = Field(min_length=1, max_length=MAX_BATCH_JOBS)
+
+class BitstreamBatchResponse(BaseModel):
+    results: List[BitstreamResponse]
+
 class BitstreamInfoResponse(BaseModel):
     size_bytes: int
     size_kb: float
@@ -70,6 +95,7 @@ class BitstreamInfoResponse(BaseModel):
     device_family: str
     format: str
     checksum: str
+    checksum_algorithm: str
 
 class DeviceListResponse(BaseModel):
     supported_devices: Dict[str, Dict[str, list]]
@@ -77,71 +103,203 @@ class DeviceListResponse(BaseModel):
 @router.get("/devices", response_model=DeviceListResponse)
 async def get_supported_devices():
     """Get list of supported FPGA devices for bitstream generation"""
+    return Response(content=DEVICES_JSON, media_type="application/json")
+
+async def _run_generation(request: BitstreamRequest) -> Tuple[str, Dict[str, Any]]:
+    """Validate the target device and run bitstream generation, raising on failure"""
+    # Validate device
+    if not bitstream_service.validate_device(request.device_family, request.device_part):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unsupported device: {request.device_family}/{request.device_part}"
+        )
+    
+    # Run bitstream generation
+    success, output, results = await run_blocking(
+        bitstream_service.generate_bitstream,
+        request.implementation_data,
+        request.top_module,
+        request.device_family,
+        request.device_part,
+        request.data_format
+    )
+    
+    if not success:
+        logger.error("Bitstream generation failed: %s", output)
+        raise HTTPException(status_code=400, detail=f"Bitstream generation failed: {output}")
+    
+    return output, results
+
+@router.post("/generate", response_model=None, responses={200: {"model": BitstreamResponse}})
+async def generate_bitstream(request: BitstreamRequest) -> ORJSONResponse:
+    """Generate bitstream from implementation data"""
     try:
-        devices = bitstream_service.supported_devices
-        return DeviceListResponse(supported_devices=devices)
+        logger.info("Bitstream generation request for %s on %s/%s", request.top_module, request.device_family, request.device_part)
+        
+        output, results = await _run_generation(request)
+        
+        # Convert bitstream to base64 for JSON response
+        _encode_bitstream_file(results)
+        
+        logger.info("Bitstream generation completed successfully for %s", request.top_module)
+        
+        # Serialize the plain dict directly; the fields are already validated
+        return ORJSONResponse(content={
+            "success": True,
+            "output": output,
+            "results": results,
+            "device_family": request.device_family,
+            "device_part": request.device_part,
+            "top_module": request.top_module
+        })
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting supported devices: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get supported devices: {str(e)}")
+        logger.error("Bitstream generation error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Bitstream generation error: {str(e)}")
 
-@router.post("/generate", response_model=BitstreamResponse)
-async def generate_bitstream(request: BitstreamRequest):
-    """Generate bitstream from implementation data"""
+@router.post("/generate/fast", response_model=None, include_in_schema=False)
+async def generate_bitstream_fast(request: Request) -> ORJSONResponse:
+    """Internal /generate variant that checks the body by hand instead of through pydantic"""
+    token = request.headers.get("x-internal-token", "")
+    if not INTERNAL_API_TOKEN or not hmac.compare_digest(token.encode(), INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(status_code=404, detail="Not Found")
+    
     try:
-        logger.info(f"Bitstream generation request for {request.top_module} on {request.device_family}/{request.device_part}")
+        data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    
+    fields = {}
+    for name in ('implementation_data', 'top_module', 'device_family', 'device_part'):
+        value = data.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise HTTPException(status_code=400, detail=f"{name} must be a non-empty string")
+        fields[name] = value.strip()
+    fields['data_format'] = data.get('data_format', 'fasm')
+    if not isinstance(fields['data_format'], str):
+        raise HTTPException(status_code=400, detail="data_format must be a string")
+
+    if not MODULE_NAME_RE.fullmatch(fields['top_module']):
+        raise HTTPException(status_code=400, detail="Top module name must be a valid Verilog identifier")
+    if fields['device_family'] not in VALID_FAMILIES:
+        raise HTTPException(status_code=400, detail=f"Device family must be one of: {sorted(VALID_FAMILIES)}")
+    if fields['data_format'] not in VALID_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Data format must be one of: {sorted(VALID_FORMATS)}")
+    
+    return await generate_bitstream(BitstreamRequest.model_construct(**fields))
+
+@router.post(
+    "/generate/raw",
+    response_class=Response,
+    responses={200: {"content": {"application/octet-stream": {}}}}
+)
+async def generate_bitstream_raw(request: BitstreamRequest) -> Response:
+    """Generate bitstream and return the binary directly, without base64 encoding"""
+    try:
+        logger.info("Raw bitstream generation request for %s on %s/%s", request.top_module, request.device_family, request.device_part)
+        
+        _, results = await _run_generation(request)
         
-        # Validate device
-        if not bitstream_service.validate_device(request.device_family, request.device_part):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unsupported device: {request.device_family}/{request.device_part}"
+        bitstream_file = results.pop('bitstream_file', None)
+        if bitstream_file is None:
+            raise HTTPException(status_code=500, detail="Bitstream generation produced no bitstream file")
+        
+        logger.info("Raw bitstream generation completed successfully for %s", request.top_module)
+        
+        # Remaining results are small scalars, so they travel as a JSON header
+        filename = f"{request.top_module}.{results.get('bitstream_format', 'bit')}"
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Bitstream-Results": orjson.dumps(results).decode('ascii')
+        }
+        if isinstance(bitstream_file, mmap.mmap):
+            # Send the mapping in chunks rather than copying it into one bytes object
+            headers["Content-Length"] = str(len(bitstream_file))
+            return StreamingResponse(
+                _iter_bitstream(bitstream_file),
+                media_type="application/octet-stream",
+                headers=headers
             )
+        return Response(content=bitstream_file, media_type="application/octet-stream", headers=headers)
         
-        # Run bitstream generation
-        success, output, results = bitstream_service.generate_bitstream(
-            request.implementation_data,
-            request.top_module,
-            request.device_family,
-            request.device_part,
-            request.data_format
-        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Raw bitstream generation error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Bitstream generation error: {str(e)}")
+
+@router.post("/generate/batch", response_model=None, responses={200: {"model": BitstreamBatchResponse}})
+async def generate_bitstreams_batch(request: BitstreamBatchRequest) -> ORJSONResponse:
+    """Generate bitstreams for several device targets concurrently"""
+    try:
+        logger.info("Batch bitstream generation request for %d targets", len(request.jobs))
         
-        if not success:
-            logger.error(f"Bitstream generation failed: {output}")
-            raise HTTPException(status_code=400, detail=f"Bitstream generation failed: {output}")
+        # Validate every device before starting any packer
+        for job in request.jobs:
+            if not bitstream_service.validate_device(job.device_family, job.device_part):
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Unsupported device: {job.device_family}/{job.device_part}"
+                )
         
-        # Convert bitstream to base64 for JSON response
-        if 'bitstream_file' in results and results['bitstream_file']:
-            results['bitstream_file_b64'] = base64.b64encode(results['bitstream_file']).decode('utf-8')
-            # Remove binary data from results
-            del results['bitstream_file']
-        
-        logger.info(f"Bitstream generation completed successfully for {request.top_module}")
-        
-        return BitstreamResponse(
-            success=success,
-            output=output,
-            results=results,
-            device_family=request.device_family,
-            device_part=request.device_part,
-            top_module=request.top_module
-        )
+        # Each target takes its own job slot, so a batch is bounded like separate
+        # requests; per-target failures are reported in their entry
+        outcomes = await asyncio.gather(*(
+            run_blocking(bitstream_service.generate_bitstream, **job.model_dump())
+            for job in request.jobs
+        ))
+        
+        entries = []
+        for job, (success, output, results) in zip(request.jobs, outcomes):
+            _encode_bitstream_file(results)
+            entries.append({
+                "success": success,
+                "output": output,
+                "results": results,
+                "device_family": job.device_family,
+                "device_part": job.device_part,
+                "top_module": job.top_module
+            })
+        
+        return ORJSONResponse(content={"results": entries})
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Bitstream generation error: {str(e)}")
+        logger.error("Batch bitstream generation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Bitstream generation error: {str(e)}")
 
+def _decode_bitstream(bitstream_b64: str) -> bytes:
+    """Decode and validate the base64 alphabet in a single pass"""
+    try:
+        return b64decode(bitstream_b64, validate=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid base64 bitstream data: {str(e)}")
+
+def _result_cache_key(bitstream_b64: str, device_family: str) -> Tuple[int, int, str]:
+    """Key repeated requests by the base64 text's built-in hash, which needs no copy"""
+    return len(bitstream_b64), hash(bitstream_b64), device_family
+
+def _cache_get(cache: OrderedDict, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+def _cache_put(cache: OrderedDict, key, value) -> None:
+    cache[key] = value
+    if len(cache) > RESULT_CACHE_SIZE:
+        cache.popitem(last=False)
+
 @router.post("/validate")
 async def validate_bitstream(bitstream_b64: str, device_family: str):
     """Validate bitstream format and content"""
     try:
-        # Decode base64 bitstream
-        try:
-            bitstream_data = base64.b64decode(bitstream_b64)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid base64 bitstream data: {str(e)}")
+        bitstream_data = _decode_bitstream(bitstream_b64)
         
         # Validate bitstream
         is_valid, message = bitstream_service.validate_bitstream(bitstream_data, device_family)
@@ -156,28 +314,69 @@ async def validate_bitstream(bitstream_b64: str, device_family: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Bitstream validation error: {str(e)}")
+        logger.error("Bitstream validation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Bitstream validation error: {str(e)}")
 
 @router.post("/info")
 async def get_bitstream_info(bitstream_b64: str, device_family: str):
     """Get information about the bitstream"""
     try:
-        # Decode base64 bitstream
-        try:
-            bitstream_data = base64.b64decode(bitstream_b64)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid base64 bitstream data: {str(e)}")
-        
-        # Get bitstream info
-        info = bitstream_service.get_bitstream_info(bitstream_data, device_family)
+        key = _result_cache_key(bitstream_b64, device_family)
+        info = _cache_get(_info_cache, key)
+        if info is None:
+            bitstream_data = _decode_bitstream(bitstream_b64)
+            
+            # Get bitstream info
+            info = bitstream_service.get_bitstream_info(bitstream_data, device_family)
+            _cache_put(_info_cache, key, info)
         
         return BitstreamInfoResponse(**info)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Bitstream info error: {str(e)}")
+        logger.error("Bitstream info error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Bitstream info error: {str(e)}")
+
+# OpenAPI description for endpoints that take the bitstream as the raw request body
+RAW_BITSTREAM_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}
+    }
+}
+
+@router.post("/validate-raw", openapi_extra=RAW_BITSTREAM_BODY)
+async def validate_bitstream_raw(request: Request, device_family: str):
+    """Validate a bitstream sent as the raw application/octet-stream body"""
+    try:
+        bitstream_data = await request.body()
+        
+        is_valid, message = bitstream_service.validate_bitstream(bitstream_data, device_family)
+        
+        return {
+            "valid": is_valid,
+            "message": message,
+            "device_family": device_family,
+            "size_bytes": len(bitstream_data)
+        }
+        
+    except Exception as e:
+        logger.error("Raw bitstream validation error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Bitstream validation error: {str(e)}")
+
+@router.post("/info-raw", response_model=BitstreamInfoResponse, openapi_extra=RAW_BITSTREAM_BODY)
+async def get_bitstream_info_raw(request: Request, device_family: str):
+    """Get information about a bitstream sent as the raw application/octet-stream body"""
+    try:
+        bitstream_data = await request.body()
+        
+        info = bitstream_service.get_bitstream_info(bitstream_data, device_family)
+        
+        return BitstreamInfoResponse(**info)
+        
+    except Exception as e:
+        logger.error("Raw bitstream info error: %s", e)
         raise HTTPException(status_code=500, detail=f"Bitstream info error: {str(e)}")
 
 @router.post("/validate-device")
@@ -191,21 +390,10 @@ async def validate_device(device_family: str, device_part: str):
             "device_part": device_part
         }
     except Exception as e:
-        logger.error(f"Device validation error: {str(e)}")
+        logger.error("Device validation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Device validation error: {str(e)}")
 
 @router.get("/health")
 async def bitstream_health():
     """Health check for bitstream service"""
-    try:
-        # Test if bitstream service is working by checking supported devices
-        devices = bitstream_service.supported_devices
-        return {
-            "status": "healthy",
-            "service": "bitstream",
-            "supported_families": list(devices.keys())
-        }
-    except Exception as e:
-        logger.error(f"Bitstream health check error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Bitstream service unhealthy: {str(e)}")
-
+    return Response(content=HEALTH_JSON, media_type="application/json")
@@ -0,0 +1,20 @@
+from typing import BinaryIO
+
+try:
+    from pybase64 import b64decode, b64encode_as_string
+except ImportError:
+    # Fall back to the stdlib codec when the SIMD build is unavailable
+    from base64 import b64decode, b64encode
+
+    def b64encode_as_string(data: bytes) -> str:
+        return b64encode(data).decode('ascii')
+
+# Multiple of 4 so every slice decodes to whole bytes on its own
+B64_DECODE_CHUNK_SIZE = 4 * 256 * 1024
+
+def b64decode_to_file(data: str, f: BinaryIO) -> None:
+    """Strictly decode base64 straight into an open file, raising ValueError on bad input"""
+    for start in range(0, len(data), B64_DECODE_CHUNK_SIZE):
+        f.write(b64decode(data[start:start + B64_DECODE_CHUNK_SIZE], validate=True))
+
+__all__ = ['b64decode', 'b64decode_to_file', 'b64encode_as_string']
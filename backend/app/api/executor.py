@@ -0,0 +1,26 @@
+import asyncio
+import os
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+# Toolchain runs are long and subprocess-bound, so allow one per core;
+# further jobs wait for a free slot
+MAX_CONCURRENT_JOBS = os.cpu_count() or 1
+_job_slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+
+# Seconds a job may wait for a slot before its request is rejected with 503;
+# unset or empty waits as long as it takes
+_queue_timeout = os.getenv("JOB_QUEUE_TIMEOUT")
+JOB_QUEUE_TIMEOUT = float(_queue_timeout) if _queue_timeout else None
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking service call in the threadpool once a job slot is free"""
+    try:
+        await asyncio.wait_for(_job_slots.acquire(), JOB_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry shortly")
+    try:
+        return await run_in_threadpool(func, *args, **kwargs)
+    finally:
+        _job_slots.release()
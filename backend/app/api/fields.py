@@ -0,0 +1,23 @@
+import re
+from typing import Annotated, Literal, get_args
+
+from pydantic import StringConstraints
+
+from ..config import MAX_REQUEST_SIZE
+
+# Shared request field types, checked by pydantic-core without a Python callback
+NonEmptyStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+PayloadStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=MAX_REQUEST_SIZE)]
+# Base64 text is checked by the strict decoder itself, so skip the extra strip pass
+Base64Str = Annotated[str, StringConstraints(min_length=1, max_length=MAX_REQUEST_SIZE)]
+ModuleName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, pattern=r'^[A-Za-z_][A-Za-z0-9_]*$')]
+DeviceFamily = Literal['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
+DataFormat = Literal['fasm', 'asc', 'config']
+ProgrammingMode = Literal['auto', 'jtag', 'spi', 'qspi']
+Stage = Literal['synthesis', 'implementation', 'bitstream_generation', 'programming']
+
+# Plain-Python equivalents for routes that bypass pydantic validation
+VALID_FAMILIES = frozenset(get_args(DeviceFamily))
+VALID_FORMATS = frozenset(get_args(DataFormat))
+VALID_MODES = frozenset(get_args(ProgrammingMode))
+MODULE_NAME_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
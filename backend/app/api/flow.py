@@ -1,177 +1,83 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, validator
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
+import asyncio
 import logging
+import orjson
 
 from ..services.fpga_flow_service import FPGAFlowService
+from .executor import run_blocking
+from .routing import ORJSONRoute, json_response
+from .fields import NonEmptyStr, PayloadStr, ModuleName, DeviceFamily, DataFormat, Stage
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse, route_class=ORJSONRoute)
 
 # Initialize FPGA flow service
 fpga_flow_service = FPGAFlowService()
 
+# Supported devices are fixed once the services are built, so serialize them once
+_supported_devices = fpga_flow_service.get_supported_devices()
+DEVICES_JSON = orjson.dumps(_supported_devices)
+HEALTH_JSON = orjson.dumps({
+    "status": "healthy",
+    "service": "fpga_flow",
+    "supported_families": {
+        stage: list(devices.keys()) for stage, devices in _supported_devices.items()
+    }
+})
+
 # Request/Response models
 class CompleteFlowRequest(BaseModel):
-    verilog_code: str
-    top_module: str
-    device_family: str
-    device_part: str
+    verilog_code: NonEmptyStr
+    top_module: ModuleName
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
     constraints: Optional[str] = None
-    stages: Optional[List[str]] = None
+    stages: Optional[List[Stage]] = None
     program_fpga: bool = False
-
-    @validator('verilog_code')
-    def validate_verilog_code(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Verilog code cannot be empty")
-        return v.strip()
-
-    @validator('top_module')
-    def validate_top_module(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Top module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Top module name must be a valid Verilog identifier")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
-
-    @validator('stages')
-    def validate_stages(cls, v):
-        if v is not None:
-            valid_stages = ['synthesis', 'implementation', 'bitstream_generation', 'programming']
-            for stage in v:
-                if stage not in valid_stages:
-                    raise ValueError(f"Invalid stage: {stage}. Must be one of: {valid_stages}")
-        return v
+    incremental: bool = False
 
 class SynthesisOnlyRequest(BaseModel):
-    verilog_code: str
-    top_module: str
-    device_family: str
-    device_part: str
+    verilog_code: NonEmptyStr
+    top_module: ModuleName
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
     constraints: Optional[str] = None
-
-    @validator('verilog_code')
-    def validate_verilog_code(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Verilog code cannot be empty")
-        return v.strip()
-
-    @validator('top_module')
-    def validate_top_module(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Top module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Top module name must be a valid Verilog identifier")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
+    incremental: bool = False
 
 class ImplementationOnlyRequest(BaseModel):
-    netlist_json: str
-    top_module: str
-    device_family: str
-    device_part: str
+    netlist_json: PayloadStr
+    top_module: ModuleName
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
     constraints: Optional[str] = None
-
-    @validator('netlist_json')
-    def validate_netlist_json(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Netlist JSON cannot be empty")
-        return v.strip()
-
-    @validator('top_module')
-    def validate_top_module(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Top module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Top module name must be a valid Verilog identifier")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
+    incremental: bool = False
 
 class BitstreamOnlyRequest(BaseModel):
-    implementation_data: str
-    top_module: str
-    device_family: str
-    device_part: str
-    data_format: str = 'fasm'
-
-    @validator('implementation_data')
-    def validate_implementation_data(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Implementation data cannot be empty")
-        return v.strip()
-
-    @validator('top_module')
-    def validate_top_module(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Top module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Top module name must be a valid Verilog identifier")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
-
-    @validator('data_format')
-    def validate_data_format(cls, v):
-        valid_formats = ['fasm', 'asc', 'config']
-        if v not in valid_formats:
-            raise ValueError(f"Data format must be one of: {valid_formats}")
-        return v
+    implementation_data: PayloadStr
+    top_module: ModuleName
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
+    data_format: DataFormat = 'fasm'
+    incremental: bool = False
 
 class FlowResponse(BaseModel):
     success: bool
     output: str
     results: Dict[str, Any]
 
+# Designs accepted by one /batch request
+MAX_BATCH_JOBS = 16
+
+class BatchFlowRequest(BaseModel):
+    jobs: List[CompleteFlowRequest] = Field(min_length=1, max_length=MAX_BATCH_JOBS)
+
+class BatchFlowResponse(BaseModel):
+    results: List[FlowResponse]
+
 class DeviceDetectionResponse(BaseModel):
     success: bool
     output: str
@@ -186,12 +92,7 @@ class SupportedDevicesResponse(BaseModel):
 @router.get("/devices", response_model=SupportedDevicesResponse)
 async def get_supported_devices():
     """Get list of supported FPGA devices for all services"""
-    try:
-        devices = fpga_flow_service.get_supported_devices()
-        return SupportedDevicesResponse(**devices)
-    except Exception as e:
-        logger.error(f"Error getting supported devices: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get supported devices: {str(e)}")
+    return Response(content=DEVICES_JSON, media_type="application/json")
 
 @router.get("/detect", response_model=DeviceDetectionResponse)
 async def detect_fpga_devices():
@@ -208,161 +109,183 @@ async def detect_fpga_devices():
         )
         
     except Exception as e:
-        logger.error(f"Device detection error: {str(e)}")
+        logger.error("Device detection error: %s", e)
         raise HTTPException(status_code=500, detail=f"Device detection error: {str(e)}")
 
-@router.post("/complete", response_model=FlowResponse)
+@router.post("/complete", response_model=None, responses={200: {"model": FlowResponse}})
 async def run_complete_flow(request: CompleteFlowRequest):
     """Run complete FPGA design flow"""
     try:
-        logger.info(f"Complete flow request for {request.top_module} on {request.device_family}/{request.device_part}")
+        logger.info("Complete flow request for %s on %s/%s", request.top_module, request.device_family, request.device_part)
         
         # Run complete flow
-        success, output, results = fpga_flow_service.run_complete_flow(
+        success, output, results = await run_blocking(
+            fpga_flow_service.run_complete_flow,
             request.verilog_code,
             request.top_module,
             request.device_family,
             request.device_part,
             request.constraints,
             request.stages,
-            request.program_fpga
+            request.program_fpga,
+            request.incremental
         )
         
         if not success:
-            logger.error(f"Complete flow failed: {output}")
+            logger.error("Complete flow failed: %s", output)
             raise HTTPException(status_code=400, detail=f"Complete flow failed: {output}")
         
-        logger.info(f"Complete flow completed successfully for {request.top_module}")
+        logger.info("Complete flow completed successfully for %s", request.top_module)
         
-        return FlowResponse(
-            success=success,
-            output=output,
-            results=results
-        )
+        return json_response({
+            "success": success,
+            "output": output,
+            "results": results
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Complete flow error: {str(e)}")
+        logger.error("Complete flow error: %s", e)
         raise HTTPException(status_code=500, detail=f"Complete flow error: {str(e)}")
 
-@router.post("/synthesis", response_model=FlowResponse)
+@router.post("/batch", response_model=None, responses={200: {"model": BatchFlowResponse}})
+async def run_batch_flow(request: BatchFlowRequest):
+    """Run complete FPGA design flows for several designs concurrently"""
+    try:
+        logger.info("Batch flow request for %d designs", len(request.jobs))
+        
+        # Concurrent flows cannot share one programming cable
+        for job in request.jobs:
+            if job.program_fpga or (job.stages and 'programming' in job.stages):
+                raise HTTPException(status_code=400, detail="Batch flows cannot program the FPGA")
+        
+        # Each design takes its own job slot, so a batch is bounded like separate
+        # requests; per-design failures are reported in their entry
+        outcomes = await asyncio.gather(*(
+            run_blocking(fpga_flow_service.run_complete_flow, **job.model_dump())
+            for job in request.jobs
+        ))
+        
+        return json_response({
+            "results": [
+                {"success": success, "output": output, "results": results}
+                for success, output, results in outcomes
+            ]
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Batch flow error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Batch flow error: {str(e)}")
+
+@router.post("/synthesis", response_model=None, responses={200: {"model": FlowResponse}})
 async def run_synthesis_only(request: SynthesisOnlyRequest):
     """Run synthesis stage only"""
     try:
-        logger.info(f"Synthesis only request for {request.top_module} on {request.device_family}/{request.device_part}")
+        logger.info("Synthesis only request for %s on %s/%s", request.top_module, request.device_family, request.device_part)
         
         # Run synthesis only
-        success, output, results = fpga_flow_service.run_synthesis_only(
+        success, output, results = await run_blocking(
+            fpga_flow_service.run_synthesis_only,
             request.verilog_code,
             request.top_module,
             request.device_family,
             request.device_part,
-            request.constraints
+            request.constraints,
+            request.incremental
         )
         
         if not success:
-            logger.error(f"Synthesis only failed: {output}")
+            logger.error("Synthesis only failed: %s", output)
             raise HTTPException(status_code=400, detail=f"Synthesis only failed: {output}")
         
-        logger.info(f"Synthesis only completed successfully for {request.top_module}")
+        logger.info("Synthesis only completed successfully for %s", request.top_module)
         
-        return FlowResponse(
-            success=success,
-            output=output,
-            results=results
-        )
+        return json_response({
+            "success": success,
+            "output": output,
+            "results": results
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Synthesis only error: {str(e)}")
+        logger.error("Synthesis only error: %s", e)
         raise HTTPException(status_code=500, detail=f"Synthesis only error: {str(e)}")
 
-@router.post("/implementation", response_model=FlowResponse)
+@router.post("/implementation", response_model=None, responses={200: {"model": FlowResponse}})
 async def run_implementation_only(request: ImplementationOnlyRequest):
     """Run implementation stage only"""
     try:
-        logger.info(f"Implementation only request for {request.top_module} on {request.device_family}/{request.device_part}")
+        logger.info("Implementation only request for %s on %s/%s", request.top_module, request.device_family, request.device_part)
         
         # Run implementation only
-        success, output, results = fpga_flow_service.run_implementation_only(
+        success, output, results = await run_blocking(
+            fpga_flow_service.run_implementation_only,
             request.netlist_json,
             request.top_module,
             request.device_family,
             request.device_part,
-            request.constraints
+            request.constraints,
+            request.incremental
         )
         
         if not success:
-            logger.error(f"Implementation only failed: {output}")
+            logger.error("Implementation only failed: %s", output)
             raise HTTPException(status_code=400, detail=f"Implementation only failed: {output}")
         
-        logger.info(f"Implementation only completed successfully for {request.top_module}")
+        logger.info("Implementation only completed successfully for %s", request.top_module)
         
-        return FlowResponse(
-            success=success,
-            output=output,
-            results=results
-        )
+        return json_response({
+            "success": success,
+            "output": output,
+            "results": results
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Implementation only error: {str(e)}")
+        logger.error("Implementation only error: %s", e)
         raise HTTPException(status_code=500, detail=f"Implementation only error: {str(e)}")
 
-@router.post("/bitstream", response_model=FlowResponse)
+@router.post("/bitstream", response_model=None, responses={200: {"model": FlowResponse}})
 async def run_bitstream_only(request: BitstreamOnlyRequest):
     """Run bitstream generation stage only"""
     try:
-        logger.info(f"Bitstream only request for {request.top_module} on {request.device_family}/{request.device_part}")
+        logger.info("Bitstream only request for %s on %s/%s", request.top_module, request.device_family, request.device_part)
         
         # Run bitstream only
-        success, output, results = fpga_flow_service.run_bitstream_only(
+        success, output, results = await run_blocking(
+            fpga_flow_service.run_bitstream_only,
             request.implementation_data,
             request.top_module,
             request.device_family,
             request.device_part,
-            request.data_format
+            request.data_format,
+            request.incremental
         )
         
         if not success:
-            logger.error(f"Bitstream only failed: {output}")
+            logger.error("Bitstream only failed: %s", output)
             raise HTTPException(status_code=400, detail=f"Bitstream only failed: {output}")
         
-        logger.info(f"Bitstream only completed successfully for {request.top_module}")
+        logger.info("Bitstream only completed successfully for %s", request.top_module)
         
-        return FlowResponse(
-            success=success,
-            output=output,
-            results=results
-        )
+        return json_response({
+            "success": success,
+            "output": output,
+            "results": results
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Bitstream only error: {str(e)}")
+        logger.error("Bitstream only error: %s", e)
         raise HTTPException(status_code=500, detail=f"Bitstream only error: {str(e)}")
 
 @router.get("/health")
 async def flow_health():
     """Health check for FPGA flow service"""
-    try:
-        # Test if flow service is working by checking supported devices
-        devices = fpga_flow_service.get_supported_devices()
-        
-        return {
-            "status": "healthy",
-            "service": "fpga_flow",
-            "supported_families": {
-                "synthesis": list(devices['synthesis'].keys()),
-                "implementation": list(devices['implementation'].keys()),
-                "bitstream": list(devices['bitstream'].keys()),
-                "programming": list(devices['programming'].keys())
-            }
-        }
-    except Exception as e:
-        logger.error(f"Flow health check error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Flow service unhealthy: {str(e)}")
-
+    return Response(content=HEALTH_JSON, media_type="application/json")
@@ -1,52 +1,38 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, validator
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import logging
+import orjson
 
-from ..services.implementation_service import ImplementationService
+from ..services import get_implementation_service
+from .executor import run_blocking
+from .routing import ORJSONRoute, json_response
+from .fields import NonEmptyStr, PayloadStr, ModuleName, DeviceFamily
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse, route_class=ORJSONRoute)
 
 # Initialize implementation service
-implementation_service = ImplementationService()
+implementation_service = get_implementation_service()
+
+# Supported devices are fixed once the service is built, so serialize them once
+DEVICES_JSON = orjson.dumps({"supported_devices": implementation_service.supported_devices})
+HEALTH_JSON = orjson.dumps({
+    "status": "healthy",
+    "service": "implementation",
+    "supported_families": list(implementation_service.supported_devices.keys())
+})
 
 # Request/Response models
 class ImplementationRequest(BaseModel):
-    netlist_json: str
-    top_module: str
-    device_family: str
-    device_part: str
+    netlist_json: PayloadStr
+    top_module: ModuleName
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
     constraints: Optional[str] = None
 
-    @validator('netlist_json')
-    def validate_netlist_json(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Netlist JSON cannot be empty")
-        return v.strip()
-
-    @validator('top_module')
-    def validate_top_module(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Top module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Top module name must be a valid Verilog identifier")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
-
 class ImplementationResponse(BaseModel):
     success: bool
     output: str
@@ -61,18 +47,13 @@ class DeviceListResponse(BaseModel):
 @router.get("/devices", response_model=DeviceListResponse)
 async def get_supported_devices():
     """Get list of supported FPGA devices for implementation"""
-    try:
-        devices = implementation_service.supported_devices
-        return DeviceListResponse(supported_devices=devices)
-    except Exception as e:
-        logger.error(f"Error getting supported devices: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get supported devices: {str(e)}")
+    return Response(content=DEVICES_JSON, media_type="application/json")
 
-@router.post("/implement", response_model=ImplementationResponse)
+@router.post("/implement", response_model=None, responses={200: {"model": ImplementationResponse}})
 async def implement_design(request: ImplementationRequest):
     """Implement design using place & route"""
     try:
-        logger.info(f"Implementation request for {request.top_module} on {request.device_family}/{request.device_part}")
+        logger.info("Implementation request for %s on %s/%s", request.top_module, request.device_family, request.device_part)
         
         # Validate device
         if not implementation_service.validate_device(request.device_family, request.device_part):
@@ -82,7 +63,8 @@ async def implement_design(request: ImplementationRequest):
             )
         
         # Run implementation
-        success, output, results = implementation_service.implement_design(
+        success, output, results = await run_blocking(
+            implementation_service.implement_design,
             request.netlist_json,
             request.top_module,
             request.device_family,
@@ -91,24 +73,24 @@ async def implement_design(request: ImplementationRequest):
         )
         
         if not success:
-            logger.error(f"Implementation failed: {output}")
+            logger.error("Implementation failed: %s", output)
             raise HTTPException(status_code=400, detail=f"Implementation failed: {output}")
         
-        logger.info(f"Implementation completed successfully for {request.top_module}")
+        logger.info("Implementation completed successfully for %s", request.top_module)
         
-        return ImplementationResponse(
-            success=success,
-            output=output,
-            results=results,
-            device_family=request.device_family,
-            device_part=request.device_part,
-            top_module=request.top_module
-        )
+        return json_response({
+            "success": success,
+            "output": output,
+            "results": results,
+            "device_family": request.device_family,
+            "device_part": request.device_part,
+            "top_module": request.top_module
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Implementation error: {str(e)}")
+        logger.error("Implementation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Implementation error: {str(e)}")
 
 @router.post("/validate-device")
@@ -122,21 +104,10 @@ async def validate_device(device_family: str, device_part: str):
             "device_part": device_part
         }
     except Exception as e:
-        logger.error(f"Device validation error: {str(e)}")
+        logger.error("Device validation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Device validation error: {str(e)}")
 
 @router.get("/health")
 async def implementation_health():
     """Health check for implementation service"""
-    try:
-        # Test if implementation service is working by checking supported devices
-        devices = implementation_service.supported_devices
-        return {
-            "status": "healthy",
-            "service": "implementation",
-            "supported_families": list(devices.keys())
-        }
-    except Exception as e:
-        logger.error(f"Implementation health check error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Implementation service unhealthy: {str(e)}")
-
+    return Response(content=HEALTH_JSON, media_type="application/json")
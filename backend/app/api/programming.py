@@ -1,52 +1,39 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, validator
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 import logging
-import base64
+import os
+import tempfile
+import time
+import orjson
 
-from ..services.programming_service import ProgrammingService
+from ..services import get_programming_service
+from ..services.programming_service import BITSTREAM_SUFFIXES
+from ..config import MAX_UPLOAD_SIZE
+from .codec import b64decode_to_file
+from .executor import run_blocking
+from .fields import NonEmptyStr, Base64Str, DeviceFamily, ProgrammingMode
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # Initialize programming service
-programming_service = ProgrammingService()
+programming_service = get_programming_service()
+
+# Supported devices are fixed once the service is built, so serialize them once
+DEVICES_JSON = orjson.dumps({"supported_devices": programming_service.supported_devices})
 
 # Request/Response models
 class ProgrammingRequest(BaseModel):
-    bitstream_b64: str
-    device_family: str
-    device_part: str
-    programming_mode: str = 'auto'
+    bitstream_b64: Base64Str
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
+    programming_mode: ProgrammingMode = 'auto'
     verify: bool = True
 
-    @validator('bitstream_b64')
-    def validate_bitstream_b64(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Bitstream data cannot be empty")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
-
-    @validator('programming_mode')
-    def validate_programming_mode(cls, v):
-        valid_modes = ['auto', 'jtag', 'spi', 'qspi']
-        if v not in valid_modes:
-            raise ValueError(f"Programming mode must be one of: {valid_modes}")
-        return v
-
 class ProgrammingResponse(BaseModel):
     success: bool
     output: str
@@ -74,12 +61,7 @@ class ProgrammingModesResponse(BaseModel):
 @router.get("/devices", response_model=DeviceListResponse)
 async def get_supported_devices():
     """Get list of supported FPGA devices for programming"""
-    try:
-        devices = programming_service.supported_devices
-        return DeviceListResponse(supported_devices=devices)
-    except Exception as e:
-        logger.error(f"Error getting supported devices: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get supported devices: {str(e)}")
+    return Response(content=DEVICES_JSON, media_type="application/json")
 
 @router.get("/detect", response_model=DeviceDetectionResponse)
 async def detect_fpga_devices():
@@ -99,47 +81,112 @@ async def detect_fpga_devices():
         logger.error(f"Device detection error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Device detection error: {str(e)}")
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def _bitstream_tempfile(device_family: str) -> str:
+    """Create an empty temp file named the way openFPGALoader expects for the family"""
+    fd, path = tempfile.mkstemp(suffix=BITSTREAM_SUFFIXES[device_family])
+    os.close(fd)
+    return path
+
+async def _run_programming(bitstream_path: str,
+                           device_family: str,
+                           device_part: str,
+                           programming_mode: str,
+                           verify: bool) -> ProgrammingResponse:
+    """Validate the target device and program it, raising on failure"""
+    # Validate device
+    if not programming_service.validate_device(device_family, device_part):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unsupported device: {device_family}/{device_part}"
+        )
+    
+    # Run programming
+    success, output, results = await run_blocking(
+        programming_service.program_fpga_from_path,
+        bitstream_path,
+        device_family,
+        device_part,
+        programming_mode,
+        verify
+    )
+    
+    if not success:
+        logger.error(f"Programming failed: {output}")
+        raise HTTPException(status_code=400, detail=f"Programming failed: {output}")
+    
+    logger.info(f"Programming completed successfully for {device_family}/{device_part}")
+    
+    return ProgrammingResponse(
+        success=success,
+        output=output,
+        results=results,
+        device_family=device_family,
+        device_part=device_part
+    )
+
 @router.post("/program", response_model=ProgrammingResponse)
 async def program_fpga(request: ProgrammingRequest):
     """Program FPGA with bitstream"""
     try:
         logger.info(f"Programming request for {request.device_family}/{request.device_part}")
         
-        # Decode base64 bitstream
+        # Decode base64 bitstream straight into the file handed to openFPGALoader
+        bitstream_path = _bitstream_tempfile(request.device_family)
         try:
-            bitstream_data = base64.b64decode(request.bitstream_b64)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid base64 bitstream data: {str(e)}")
-        
-        # Validate device
-        if not programming_service.validate_device(request.device_family, request.device_part):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unsupported device: {request.device_family}/{request.device_part}"
+            with open(bitstream_path, 'wb') as f:
+                try:
+                    b64decode_to_file(request.bitstream_b64, f)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid base64 bitstream data: {str(e)}")
+            
+            return await _run_programming(
+                bitstream_path,
+                request.device_family,
+                request.device_part,
+                request.programming_mode,
+                request.verify
             )
+        finally:
+            os.unlink(bitstream_path)
         
-        # Run programming
-        success, output, results = programming_service.program_fpga(
-            bitstream_data,
-            request.device_family,
-            request.device_part,
-            request.programming_mode,
-            request.verify
-        )
-        
-        if not success:
-            logger.error(f"Programming failed: {output}")
-            raise HTTPException(status_code=400, detail=f"Programming failed: {output}")
-        
-        logger.info(f"Programming completed successfully for {request.device_family}/{request.device_part}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Programming error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Programming error: {str(e)}")
+
+@router.post("/program-binary", response_model=ProgrammingResponse)
+async def program_fpga_binary(file: UploadFile = File(...),
+                              device_family: DeviceFamily = Form(...),
+                              device_part: NonEmptyStr = Form(...),
+                              programming_mode: ProgrammingMode = Form('auto'),
+                              verify: bool = Form(True)):
+    """Program FPGA with a raw .bit/.bin upload, skipping base64 transcoding"""
+    try:
+        logger.info(f"Binary programming request for {device_family}/{device_part}")
         
-        return ProgrammingResponse(
-            success=success,
-            output=output,
-            results=results,
-            device_family=request.device_family,
-            device_part=request.device_part
-        )
+        # Stream the upload to disk rather than holding it in memory
+        bitstream_path = _bitstream_tempfile(device_family)
+        try:
+            with open(bitstream_path, 'wb') as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    if f.tell() > MAX_UPLOAD_SIZE:
+                        raise HTTPException(status_code=413, detail=f"Bitstream exceeds {MAX_UPLOAD_SIZE} bytes")
+                if not f.tell():
+                    raise HTTPException(status_code=400, detail="Bitstream data cannot be empty")
+            
+            return await _run_programming(
+                bitstream_path,
+                device_family,
+                device_part,
+                programming_mode,
+                verify
+            )
+        finally:
+            os.unlink(bitstream_path)
         
     except HTTPException:
         raise
@@ -192,12 +239,26 @@ async def validate_device(device_family: str, device_part: str):
         logger.error(f"Device validation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Device validation error: {str(e)}")
 
+# The status check shells out to openFPGALoader, so health probes reuse a recent result
+STATUS_TTL = 5.0  # seconds
+_cached_status = (0.0, None)
+
+async def _programming_status():
+    """Return get_programming_status(), refreshed at most once per STATUS_TTL"""
+    global _cached_status
+    checked_at, status = _cached_status
+    now = time.monotonic()
+    if status is None or now - checked_at >= STATUS_TTL:
+        status = await run_in_threadpool(programming_service.get_programming_status)
+        _cached_status = (now, status)
+    return status
+
 @router.get("/health")
 async def programming_health():
     """Health check for programming service"""
     try:
         # Test if programming service is working by checking status
-        success, output, status = programming_service.get_programming_status()
+        success, output, status = await _programming_status()
         
         return {
             "status": "healthy" if success else "unhealthy",
@@ -0,0 +1,32 @@
+from typing import Any, Callable, Dict
+
+import orjson
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+class ORJSONRequest(Request):
+    """Request that parses its JSON body with orjson instead of the stdlib json module"""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+class ORJSONRoute(APIRoute):
+    """Route class that hands FastAPI an ORJSONRequest for body parsing"""
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def orjson_route_handler(request: Request) -> Response:
+            return await original_route_handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
+
+# Serializes plain response dicts straight to JSON bytes in one pydantic-core pass
+_payload_adapter = TypeAdapter(Dict[str, Any])
+
+def json_response(payload: Dict[str, Any]) -> Response:
+    """Build a JSON response from a plain dict without constructing a response model"""
+    return Response(content=_payload_adapter.dump_json(payload), media_type="application/json")
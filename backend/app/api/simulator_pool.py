@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from ..services.verilog_simulator import VerilogSimulator
+
+logger = logging.getLogger(__name__)
+
+# Simulators probe the toolchain and create a work dir on construction, so keep
+# up to SIM_POOL of them warm and hand them out one request at a time
+SIM_POOL_SIZE = int(os.getenv('SIM_POOL', '8'))
+_pool: asyncio.Queue = asyncio.Queue(maxsize=SIM_POOL_SIZE)
+_created = 0
+
+@asynccontextmanager
+async def acquire_simulator():
+    """Borrow a simulator from the pool, building one while the pool is still filling"""
+    global _created
+    if _pool.empty() and _created < SIM_POOL_SIZE:
+        simulator = VerilogSimulator()
+        _created += 1
+    else:
+        simulator = await _pool.get()
+    try:
+        yield simulator
+    finally:
+        _return_simulator(simulator)
+
+def _return_simulator(simulator: VerilogSimulator) -> None:
+    """Reset a borrowed simulator and put it back, replacing it if the reset fails"""
+    global _created
+    try:
+        simulator.reset()
+    except Exception:
+        logger.exception("Discarding simulator that failed to reset")
+        simulator.cleanup()
+        # Hand a fresh instance to the pool so requests waiting on it are served;
+        # if even that fails, free the slot for the next request to fill
+        try:
+            simulator = VerilogSimulator()
+        except Exception:
+            logger.exception("Could not replace discarded simulator")
+            _created -= 1
+            return
+    _pool.put_nowait(simulator)
@@ -1,52 +1,38 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, validator
+from fastapi.responses import Response
+from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import logging
+import orjson
 
-from ..services.synthesis_service import SynthesisService
+from ..services import get_synthesis_service
+from .executor import run_blocking
+from .fields import NonEmptyStr, ModuleName, DeviceFamily
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # Initialize synthesis service
-synthesis_service = SynthesisService()
+synthesis_service = get_synthesis_service()
+
+# Supported devices are fixed once the service is built, so serialize them once
+_supported_devices = synthesis_service.get_supported_devices()
+DEVICES_JSON = orjson.dumps({"supported_devices": _supported_devices})
+HEALTH_JSON = orjson.dumps({
+    "status": "healthy",
+    "service": "synthesis",
+    "supported_families": list(_supported_devices.keys())
+})
 
 # Request/Response models
 class SynthesisRequest(BaseModel):
-    verilog_code: str
-    top_module: str
-    device_family: str
-    device_part: str
+    verilog_code: NonEmptyStr
+    top_module: ModuleName
+    device_family: DeviceFamily
+    device_part: NonEmptyStr
     constraints: Optional[str] = None
 
-    @validator('verilog_code')
-    def validate_verilog_code(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Verilog code cannot be empty")
-        return v.strip()
-
-    @validator('top_module')
-    def validate_top_module(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Top module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Top module name must be a valid Verilog identifier")
-        return v.strip()
-
-    @validator('device_family')
-    def validate_device_family(cls, v):
-        valid_families = ['xilinx_7series', 'lattice_ice40', 'lattice_ecp5']
-        if v not in valid_families:
-            raise ValueError(f"Device family must be one of: {valid_families}")
-        return v
-
-    @validator('device_part')
-    def validate_device_part(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Device part cannot be empty")
-        return v.strip()
-
 class SynthesisResponse(BaseModel):
     success: bool
     output: str
@@ -61,12 +47,7 @@ class DeviceListResponse(BaseModel):
 @router.get("/devices", response_model=DeviceListResponse)
 async def get_supported_devices():
     """Get list of supported FPGA devices for synthesis"""
-    try:
-        devices = synthesis_service.get_supported_devices()
-        return DeviceListResponse(supported_devices=devices)
-    except Exception as e:
-        logger.error(f"Error getting supported devices: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get supported devices: {str(e)}")
+    return Response(content=DEVICES_JSON, media_type="application/json")
 
 @router.post("/synthesize", response_model=SynthesisResponse)
 async def synthesize_design(request: SynthesisRequest):
@@ -82,7 +63,8 @@ async def synthesize_design(request: SynthesisRequest):
             )
         
         # Run synthesis
-        success, output, results = synthesis_service.synthesize_design(
+        success, output, results = await run_blocking(
+            synthesis_service.synthesize_design,
             request.verilog_code,
             request.top_module,
             request.device_family,
@@ -128,15 +110,4 @@ async def validate_device(device_family: str, device_part: str):
 @router.get("/health")
 async def synthesis_health():
     """Health check for synthesis service"""
-    try:
-        # Test if synthesis service is working by checking supported devices
-        devices = synthesis_service.get_supported_devices()
-        return {
-            "status": "healthy",
-            "service": "synthesis",
-            "supported_families": list(devices.keys())
-        }
-    except Exception as e:
-        logger.error(f"Synthesis health check error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Synthesis service unhealthy: {str(e)}")
-
+    return Response(content=HEALTH_JSON, media_type="application/json")
@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import Dict, Optional, List
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File
+from fastapi.responses import FileResponse, ORJSONResponse
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import fcntl
+import gzip
+import logging
 import uuid
-from datetime import datetime, timedelta
-import json
+from datetime import datetime, timedelta, timezone
+import orjson
 import os
 import shutil
 import tempfile
+import time
+
+from ..config import MAX_UPLOAD_SIZE
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -13,23 +24,167 @@ router = APIRouter()
 WAVEFORMS_DIR = os.path.join(tempfile.gettempdir(), 'verilog_waveforms')
 os.makedirs(WAVEFORMS_DIR, exist_ok=True)
 
+# Bound the store: expired waveforms are swept periodically and only the
+# newest WAVEFORM_CACHE_MAX uploads are kept
+WAVEFORM_CACHE_MAX = int(os.getenv('WAVEFORM_CACHE_MAX', '1024'))
+WAVEFORM_SWEEP_INTERVAL = 60  # seconds
+
+# One JSON line per upload, plus {"waveform_id", "deleted": true} tombstones,
+# so listing is a single sequential read instead of a stat/open per directory
+INDEX_PATH = os.path.join(WAVEFORMS_DIR, 'index.jsonl')
+INDEX_STALE_RATIO = 0.2
+
+def _expires_at_ts(expiration: datetime) -> int:
+    return int(expiration.replace(tzinfo=timezone.utc).timestamp())
+
+def _is_expired(entry: Dict, now: float) -> bool:
+    # Older metadata only carries the ISO string
+    expires_at_ts = entry.get("expires_at_ts")
+    if expires_at_ts is None:
+        expires_at_ts = _expires_at_ts(datetime.fromisoformat(entry["expires_at"]))
+    return now > expires_at_ts
+
+def _read_index(f, deleted: Optional[set] = None) -> Tuple[Dict[str, Dict], int]:
+    """Replay the index into {waveform_id: entry}, also returning the line count.
+    
+    Tombstoned ids are added to deleted when it is given.
+    """
+    entries = {}
+    lines = 0
+    for line in f:
+        if not line.strip():
+            continue
+        lines += 1
+        try:
+            entry = orjson.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(entry, dict) or "waveform_id" not in entry:
+            continue
+        if entry.get("deleted"):
+            entries.pop(entry["waveform_id"], None)
+            if deleted is not None:
+                deleted.add(entry["waveform_id"])
+        else:
+            entries[entry["waveform_id"]] = entry
+    return entries, lines
+
+def _append_index(entry: Dict) -> None:
+    with open(INDEX_PATH, 'ab') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(orjson.dumps(entry) + b'\n')
+
+def _compact_index(drop=(), add=()) -> None:
+    """Rewrite the index without tombstones, expired or dropped ids, adding any missing entries."""
+    now = time.time()
+    deleted = set()
+    with open(INDEX_PATH, 'a+b') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        entries, _ = _read_index(f, deleted)
+        for waveform_id in drop:
+            entries.pop(waveform_id, None)
+        # add may predate the lock, so never revive an id deleted since
+        for entry in add:
+            if entry["waveform_id"] not in deleted:
+                entries.setdefault(entry["waveform_id"], entry)
+        f.seek(0)
+        f.truncate()
+        f.writelines(orjson.dumps(entry) + b'\n' for entry in entries.values() if not _is_expired(entry, now))
+
+def sweep_waveforms() -> None:
+    """Delete expired waveforms and the oldest ones beyond WAVEFORM_CACHE_MAX."""
+    now = time.time()
+    index_missing = not os.path.exists(INDEX_PATH)
+    live = []
+    removed = []
+    # DirEntry caches the readdir type, so is_dir() costs no extra stat
+    with os.scandir(WAVEFORMS_DIR) as entries:
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                with open(entry.path + '/metadata.json', 'rb') as f:
+                    metadata = orjson.loads(f.read())
+                if _is_expired(metadata, now):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed.append(entry.name)
+                else:
+                    live.append((entry.stat(follow_symlinks=False).st_mtime, entry.name, metadata))
+            except FileNotFoundError:
+                continue
+            except Exception:
+                logger.exception("Error sweeping waveform %s", entry.name)
+    
+    if len(live) > WAVEFORM_CACHE_MAX:
+        live.sort(key=lambda item: item[0])
+        evicted = live[:len(live) - WAVEFORM_CACHE_MAX]
+        live = live[len(live) - WAVEFORM_CACHE_MAX:]
+        for _, waveform_id, _ in evicted:
+            shutil.rmtree(WAVEFORMS_DIR + '/' + waveform_id, ignore_errors=True)
+            removed.append(waveform_id)
+    
+    # The index is append-only between sweeps: it is only rewritten to drop what
+    # was removed, or to backfill directories written before it existed
+    if index_missing:
+        _compact_index(drop=removed, add=[
+            {"waveform_id": waveform_id, **metadata} for _, waveform_id, metadata in live
+        ])
+    elif removed:
+        _compact_index(drop=removed)
+
+async def _sweep() -> None:
+    # A failed sweep is retried next time instead of propagating
+    try:
+        await asyncio.to_thread(sweep_waveforms)
+    except Exception:
+        logger.exception("Waveform sweep failed")
+
+async def _sweep_periodically() -> None:
+    while True:
+        await _sweep()
+        await asyncio.sleep(WAVEFORM_SWEEP_INTERVAL)
+
+# Long-running servers sweep from the lifespan task. The Lambda handler runs with
+# lifespan off, so there uploads sweep instead, at most once per interval.
+_sweeper: Optional[asyncio.Task] = None
+_last_sweep = 0.0
+
+async def _sweep_if_due() -> None:
+    global _last_sweep
+    now = time.monotonic()
+    if _sweeper is None and now - _last_sweep >= WAVEFORM_SWEEP_INTERVAL:
+        _last_sweep = now
+        await _sweep()
+
+@asynccontextmanager
+async def lifespan(app) -> AsyncIterator[None]:
+    """Run the waveform sweeper for as long as the app is up"""
+    global _sweeper
+    _sweeper = asyncio.create_task(_sweep_periodically())
+    try:
+        yield
+    finally:
+        _sweeper.cancel()
+        _sweeper = None
+
+UPLOAD_CHUNK_SIZE = 1 << 20
+VCD_HEADER_SIZE = 100
+VCD_GZIP_LEVEL = 6
+
 def is_valid_vcd(content: bytes) -> bool:
     """Check if the content appears to be a valid VCD file."""
-    try:
-        # Check for VCD header
-        header = content.decode('utf-8', errors='ignore')[:100]
-        return '$date' in header or '$version' in header
-    except:
-        return False
+    # Search the raw header bytes; no need to decode anything
+    header = content[:VCD_HEADER_SIZE]
+    return b'$date' in header or b'$version' in header
 
 @router.post("/upload")
 async def upload_waveform(file: UploadFile = File(...)):
     """Upload a VCD file and store it in the filesystem."""
     try:
-        content = await file.read()
-        
-        # Validate VCD file
-        if not is_valid_vcd(content):
+        # Validate the VCD header from the first chunk only
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not is_valid_vcd(chunk):
             raise HTTPException(status_code=400, detail="Invalid VCD file format")
             
         waveform_id = str(uuid.uuid4())
@@ -39,47 +194,59 @@ async def upload_waveform(file: UploadFile = File(...)):
         waveform_dir = os.path.join(WAVEFORMS_DIR, waveform_id)
         os.makedirs(waveform_dir, exist_ok=True)
         
-        # Save the VCD file
+        # Stream the VCD file to disk so memory stays bounded by the chunk size,
+        # keeping a gzip copy alongside it for the precompressed download
         vcd_path = os.path.join(waveform_dir, 'waveform.vcd')
-        with open(vcd_path, 'wb') as f:
-            f.write(content)
+        with open(vcd_path, 'wb') as f, \
+                gzip.open(vcd_path + '.gz', 'wb', compresslevel=VCD_GZIP_LEVEL) as gz:
+            while chunk:
+                f.write(chunk)
+                if f.tell() > MAX_UPLOAD_SIZE:
+                    break
+                await asyncio.to_thread(gz.write, chunk)
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if chunk:
+            shutil.rmtree(waveform_dir, ignore_errors=True)
+            raise HTTPException(status_code=413, detail=f"Waveform exceeds {MAX_UPLOAD_SIZE} bytes")
         
         # Save metadata
         metadata = {
             "filename": file.filename,
             "uploaded_at": datetime.utcnow().isoformat(),
-            "expires_at": expiration.isoformat()
+            "expires_at": expiration.isoformat(),
+            "expires_at_ts": _expires_at_ts(expiration)
         }
         metadata_path = os.path.join(waveform_dir, 'metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f)
+        with open(metadata_path, 'wb') as f:
+            f.write(orjson.dumps(metadata))
+        _append_index({"waveform_id": waveform_id, **metadata})
+        await _sweep_if_due()
         
         return {
             "waveform_id": waveform_id,
             "share_url": f"/api/v1/waveform/{waveform_id}",
             "expires_at": expiration.isoformat()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{waveform_id}")
-async def get_waveform(waveform_id: str):
-    """Retrieve a waveform by its ID."""
-    waveform_dir = os.path.join(WAVEFORMS_DIR, waveform_id)
-    if not os.path.exists(waveform_dir):
-        raise HTTPException(status_code=404, detail="Waveform not found")
+def _load_metadata(waveform_id: str):
+    """Return the directory and metadata of a live waveform, raising 404 if gone."""
+    waveform_dir = WAVEFORMS_DIR + '/' + waveform_id
     
-    # Read metadata
-    metadata_path = os.path.join(waveform_dir, 'metadata.json')
+    # Read metadata; a missing file doubles as the existence check
     try:
-        with open(metadata_path, 'r') as f:
-            metadata = json.load(f)
+        with open(waveform_dir + '/metadata.json', 'rb') as f:
+            metadata = orjson.loads(f.read())
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Waveform not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading metadata: {str(e)}")
     
     # Check expiration
-    expiration = datetime.fromisoformat(metadata["expires_at"])
-    if datetime.utcnow() > expiration:
+    if _is_expired(metadata, time.time()):
         # Clean up expired waveform
         try:
             shutil.rmtree(waveform_dir)
@@ -87,58 +254,74 @@ async def get_waveform(waveform_id: str):
             print(f"Error cleaning up expired waveform: {str(e)}")
         raise HTTPException(status_code=404, detail="Waveform has expired")
     
+    return waveform_dir, metadata
+
+@router.get("/{waveform_id}")
+async def get_waveform(waveform_id: str):
+    """Retrieve a waveform by its ID."""
+    waveform_dir, metadata = _load_metadata(waveform_id)
+    
     # Read VCD file
-    vcd_path = os.path.join(waveform_dir, 'waveform.vcd')
+    vcd_path = waveform_dir + '/waveform.vcd'
     try:
         with open(vcd_path, 'rb') as f:
             content = f.read()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading VCD file: {str(e)}")
     
-    return {
+    # Returned directly so the multi-megabyte content skips jsonable_encoder
+    return ORJSONResponse({
         "content": content.decode('utf-8', errors='ignore'),
         "filename": metadata["filename"],
         "uploaded_at": metadata["uploaded_at"],
         "expires_at": metadata["expires_at"]
-    }
+    })
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip with a non-zero q; an explicit gzip entry overrides "*"."""
+    weights = {}
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        if name not in ('gzip', '*'):
+            continue
+        q = params.strip().lower()
+        try:
+            weights[name] = float(q[2:]) if q.startswith('q=') else 1.0
+        except ValueError:
+            weights[name] = 0.0
+    return weights.get('gzip', weights.get('*', 0.0)) > 0
+
+@router.get("/{waveform_id}/vcd")
+async def download_waveform(waveform_id: str, request: Request):
+    """Stream the stored VCD file, gzip-encoded when the client accepts it and a compressed copy exists."""
+    waveform_dir, metadata = _load_metadata(waveform_id)
+    
+    vcd_path = waveform_dir + '/waveform.vcd'
+    headers = {"X-Filename": metadata["filename"] or "waveform.vcd", "Vary": "Accept-Encoding"}
+    if _accepts_gzip(request.headers.get('accept-encoding', '')) and os.path.exists(vcd_path + '.gz'):
+        headers["Content-Encoding"] = "gzip"
+        return FileResponse(vcd_path + '.gz', media_type='text/plain', headers=headers)
+    if not os.path.exists(vcd_path):
+        raise HTTPException(status_code=404, detail="Waveform not found")
+    return FileResponse(vcd_path, media_type='text/plain', headers=headers)
 
 @router.get("/")
 async def list_waveforms():
     """List all available waveforms."""
     try:
-        waveforms = []
-        for waveform_id in os.listdir(WAVEFORMS_DIR):
-            waveform_dir = os.path.join(WAVEFORMS_DIR, waveform_id)
-            if not os.path.isdir(waveform_dir):
-                continue
-                
-            metadata_path = os.path.join(waveform_dir, 'metadata.json')
-            if not os.path.exists(metadata_path):
-                continue
-                
-            try:
-                with open(metadata_path, 'r') as f:
-                    metadata = json.load(f)
-                    
-                # Check expiration
-                expiration = datetime.fromisoformat(metadata["expires_at"])
-                if datetime.utcnow() > expiration:
-                    # Clean up expired waveform
-                    try:
-                        shutil.rmtree(waveform_dir)
-                    except Exception as e:
-                        print(f"Error cleaning up expired waveform: {str(e)}")
-                    continue
-                    
-                waveforms.append({
-                    "waveform_id": waveform_id,
-                    "filename": metadata["filename"],
-                    "uploaded_at": metadata["uploaded_at"],
-                    "expires_at": metadata["expires_at"]
-                })
-            except Exception as e:
-                print(f"Error reading metadata for {waveform_id}: {str(e)}")
-                continue
+        try:
+            with open(INDEX_PATH, 'rb') as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                entries, lines = _read_index(f)
+        except FileNotFoundError:
+            return {"waveforms": []}
+        
+        now = time.time()
+        waveforms = [entry for entry in entries.values() if not _is_expired(entry, now)]
+        
+        if lines - len(waveforms) > lines * INDEX_STALE_RATIO:
+            await asyncio.to_thread(_compact_index)
                 
         return {"waveforms": waveforms}
     except Exception as e:
@@ -153,6 +336,7 @@ async def delete_waveform(waveform_id: str):
         
     try:
         shutil.rmtree(waveform_dir)
+        _append_index({"waveform_id": waveform_id, "deleted": True})
         return {"message": "Waveform deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting waveform: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,24 @@
+import os
+
+# Largest request body accepted, in bytes; also caps the big text payload fields
+MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE", str(64 * 1024 * 1024)))
+
+# Largest file accepted by the streaming uploads (waveforms, binary bitstreams);
+# they write to disk chunk by chunk, so they are exempt from MAX_REQUEST_SIZE
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(1024 * 1024 * 1024)))
+
+# Shared secret for internal-only endpoints; they are disabled when unset
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+# Deployment environment; "development" turns on debug logging
+ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
+
+# Log output: "json" for one JSON object per line, "text" for plain lines
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text" if ENVIRONMENT == "development" else "json")
+
+# Comma-separated list of origins allowed to call the API from a browser
+CORS_ORIGINS = frozenset(
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000,https://open-net.vercel.app").split(",")
+    if origin.strip()
+)
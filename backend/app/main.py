@@ -1,148 +1,221 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from pydantic import BaseModel, validator
+from fastapi.responses import ORJSONResponse, Response
+import atexit
 import os
 import logging
+import queue
 import sys
 import json
 import time
-from app.services.verilog_simulator import VerilogSimulator
+import orjson
+from logging.handlers import QueueHandler, QueueListener
+from app.config import MAX_REQUEST_SIZE, ENVIRONMENT, CORS_ORIGINS, LOG_FORMAT
+from app.api.fields import MODULE_NAME_RE
+from app.api.simulator_pool import acquire_simulator
+from app.api.simulation import SimulationRequest, SimulationResponse
 from app.api import waveform, synthesis, flow, bitstream, implementation, programming
 
-# Configure logging to output to stdout/stderr for Vercel
+# Configure logging to output to stdout for Vercel. Records are queued and
+# written by a listener thread so request handlers never block on stdout.
+_log_queue = queue.SimpleQueue()
+
+# Attributes every record has; anything else was passed through extra=
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+class JSONFormatter(logging.Formatter):
+    """Format each record as one JSON object, including any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        return orjson.dumps(entry, default=str).decode()
+
+_log_stream = logging.StreamHandler(sys.stdout)
+_log_stream.setFormatter(
+    JSONFormatter() if LOG_FORMAT == "json"
+    else logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+)
+_log_listener: QueueListener = None
+
+def _start_log_listener() -> None:
+    # Threads do not survive fork, so preforked workers start their own listener
+    global _log_listener
+    _log_listener = QueueListener(_log_queue, _log_stream, respect_handler_level=True)
+    _log_listener.start()
+
+_start_log_listener()
+os.register_at_fork(after_in_child=_start_log_listener)
+atexit.register(lambda: _log_listener.stop())
+
+# force replaces the handler the simulator module installs on import; the
+# queue side passes messages through unformatted
 logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+    level=logging.DEBUG if ENVIRONMENT == "development" else logging.WARNING,
+    format='%(message)s',
+    handlers=[QueueHandler(_log_queue)],
+    force=True
 )
 logger = logging.getLogger(__name__)
 
-# Log environment information
-logger.info(f"Python version: {sys.version}")
-logger.info(f"Current working directory: {os.getcwd()}")
+# Per-request access and Lambda event logs are only useful while developing
+if ENVIRONMENT != "development":
+    logging.getLogger("uvicorn.access").disabled = True
+    logging.getLogger("mangum").setLevel(logging.WARNING)
+
+# API docs and the OpenAPI schema are only served in development, which keeps
+# their routes out of production cold starts
+_DOCS_ENABLED = ENVIRONMENT == "development"
 
 app = FastAPI(
     title="OpenNet API",
     description="A modern web-based alternative to Vivado for Verilog simulation",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=waveform.lifespan,
+    docs_url="/docs" if _DOCS_ENABLED else None,
+    redoc_url="/redoc" if _DOCS_ENABLED else None,
+    openapi_url="/openapi.json" if _DOCS_ENABLED else None,
+    swagger_ui_oauth2_redirect_url="/docs/oauth2-redirect" if _DOCS_ENABLED else None,
 )
 
-# Get CORS origins from environment variable or use default
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,https://open-net.vercel.app").split(",")
-logger.info(f"CORS_ORIGINS: {CORS_ORIGINS}")
+# Streaming uploads never buffer the body and enforce MAX_UPLOAD_SIZE themselves
+STREAMING_UPLOAD_PATHS = frozenset({
+    "/api/v1/waveform/upload",
+    "/api/v1/programming/program-binary"
+})
+
+# Registered before CORS so that CORS stays the outermost middleware
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    """Reject oversized payloads from Content-Length before the body is read"""
+    content_length = request.headers.get("content-length")
+    if (content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_SIZE
+            and request.url.path not in STREAMING_UPLOAD_PATHS):
+        return ORJSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds {MAX_REQUEST_SIZE} bytes"}
+        )
+    return await call_next(request)
+
+# CORS origins come from the environment as a frozenset, so the per-request
+# origin check is a hash lookup
+logger.debug("CORS_ORIGINS: %s", sorted(CORS_ORIGINS))
+
+# Let browsers cache preflight results for a day instead of re-sending OPTIONS
+CORS_MAX_AGE = 86400
 
 # Use specific origins with credentials enabled
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["https://open-net.vercel.app", "http://localhost:3000"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["*"]
+    expose_headers=["*"],
+    max_age=CORS_MAX_AGE
 )
 
-# Define models for the simulation API
-class SimulationRequest(BaseModel):
-    verilog_code: str
-    testbench_code: str
-    top_module: str
-    top_testbench: str
-
-    @validator('verilog_code', 'testbench_code')
-    def validate_code(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Code cannot be empty")
-        return v.strip()
-
-    @validator('top_module', 'top_testbench')
-    def validate_module_names(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Module name cannot be empty")
-        if not v.strip().isidentifier():
-            raise ValueError("Module name must be a valid Verilog identifier")
-        return v.strip()
-
-class SimulationResponse(BaseModel):
-    success: bool
-    output: str
-    waveform_data: str
+# Only the health timestamp changes between requests, so serialize the rest
+# once and append the timestamp as the last member
+HEALTH_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "version": "1.0.0",
+    "environment": ENVIRONMENT
+})[:-1] + b',"timestamp":'
+TEST_JSON = orjson.dumps({
+    "status": "success",
+    "message": "Test endpoint is working",
+    "python_version": sys.version,
+    "current_dir": os.getcwd(),
+})
 
 @app.get("/")
 async def root():
-    logger.info("Root endpoint called")
-    return {"message": "Backend is running"}
+    logger.debug("Root endpoint called")
+    return ORJSONResponse({"message": "Backend is running"})
 
 @app.get("/health")
 async def health_check():
-    logger.info("Health check endpoint called")
-    return {
-        "status": "healthy",
-        "timestamp": time.time(),
-        "version": "1.0.0",
-        "environment": os.getenv("ENVIRONMENT", "production")
-    }
+    logger.debug("Health check endpoint called")
+    return Response(content=HEALTH_PREFIX + b'%f}' % time.time(), media_type="application/json")
 
 @app.get("/test")
 async def test_endpoint():
     """Simple test endpoint to verify the serverless function is working"""
-    logger.info("Test endpoint called")
-    return {
-        "status": "success",
-        "message": "Test endpoint is working",
-        "python_version": sys.version,
-        "current_dir": os.getcwd(),
-    }
-
-@app.post("/api/v1/simulate", response_model=SimulationResponse)
+    logger.debug("Test endpoint called")
+    return Response(content=TEST_JSON, media_type="application/json")
+
+@app.post("/api/v1/simulate", response_model=None, responses={200: {"model": SimulationResponse}})
 async def simulate_verilog(request: SimulationRequest):
     """Real simulation endpoint using Icarus Verilog"""
-    logger.info(f"Simulation request received for {request.top_module}")
+    logger.info("Simulation request received for %s", request.top_module)
     try:
-        # Create a simulator instance
-        simulator = VerilogSimulator()
-        
-        # Run the simulation
-        success, output, waveform_data = await simulator.compile_and_simulate(
-            request.verilog_code,
-            request.testbench_code,
-            request.top_module,
-            request.top_testbench
-        )
-        
-        if not success:
-            # Return error response with proper structure
-            return SimulationResponse(
-                success=False,
-                output=output,
-                waveform_data=""
+        # Borrow a warm simulator instance and run the simulation
+        async with acquire_simulator() as simulator:
+            success, output, waveform_data = await simulator.compile_and_simulate(
+                request.verilog_code,
+                request.testbench_code,
+                request.top_module,
+                request.top_testbench
             )
-            
-        return SimulationResponse(
-            success=success,
-            output=output,
-            waveform_data=waveform_data
-        )
+        
+        return ORJSONResponse({
+            "success": success,
+            "output": output,
+            "waveform_data": waveform_data if success else ""
+        })
     except Exception as e:
-        logger.error(f"Error in simulation: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
-        return SimulationResponse(
-            success=False,
-            output=f"Simulation error: {str(e)}",
-            waveform_data=""
-        )
+        logger.exception("Error in simulation")
+        return ORJSONResponse({
+            "success": False,
+            "output": f"Simulation error: {str(e)}",
+            "waveform_data": ""
+        })
+
+@app.post(
+    "/api/v1/simulate-raw",
+    response_model=None,
+    responses={200: {"model": SimulationResponse}},
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": SimulationRequest.model_json_schema()}}
+    }}
+)
+async def simulate_verilog_raw(request: Request):
+    """Simulation endpoint that parses the body once with orjson, bypassing pydantic for large sources"""
+    try:
+        data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    
+    fields = {}
+    for name in ('verilog_code', 'testbench_code', 'top_module', 'top_testbench'):
+        value = data.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise HTTPException(status_code=400, detail=f"{name} must be a non-empty string")
+        fields[name] = value.strip()
+    
+    for name in ('top_module', 'top_testbench'):
+        if not MODULE_NAME_RE.fullmatch(fields[name]):
+            raise HTTPException(status_code=400, detail="Module name must be a valid Verilog identifier")
+    
+    return await simulate_verilog(SimulationRequest.model_construct(**fields))
 
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {str(exc)}")
-    import traceback
-    logger.error(traceback.format_exc())
+    # exc_info leaves traceback formatting to the handler that emits the record
+    logger.error("Unhandled exception: %s", exc, exc_info=exc)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": f"Internal server error: {str(exc)}"}
     )
@@ -155,11 +228,27 @@ app.include_router(bitstream.router, prefix="/api/v1/bitstream", tags=["bitstrea
 app.include_router(implementation.router, prefix="/api/v1/implementation", tags=["implementation"])
 app.include_router(programming.router, prefix="/api/v1/programming", tags=["programming"])
 
-# Handler for AWS Lambda
+# Handler for AWS Lambda; run its event loop on uvloop when available
 from mangum import Mangum
-handler = Mangum(app)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+# Lambda would run lifespan startup and shutdown around every invocation, starting
+# a full waveform sweep per request, so the handler skips it and uploads sweep instead
+handler = Mangum(app, lifespan="off")
 
 # For local development
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8001, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8001,
+        reload=True,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False
+    )
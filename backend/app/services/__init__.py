@@ -1 +1,25 @@
-# This file makes the services directory a Python package 
\ No newline at end of file
+# This file makes the services directory a Python package
+from functools import lru_cache
+
+from .synthesis_service import SynthesisService
+from .implementation_service import ImplementationService
+from .bitstream_service import BitstreamService
+from .programming_service import ProgrammingService
+
+# One instance of each stateless service per process, shared by the routers and
+# the flow orchestrator, built on first use
+@lru_cache(maxsize=None)
+def get_synthesis_service() -> SynthesisService:
+    return SynthesisService()
+
+@lru_cache(maxsize=None)
+def get_implementation_service() -> ImplementationService:
+    return ImplementationService()
+
+@lru_cache(maxsize=None)
+def get_bitstream_service() -> BitstreamService:
+    return BitstreamService()
+
+@lru_cache(maxsize=None)
+def get_programming_service() -> ProgrammingService:
+    return ProgrammingService()
@@ -1,12 +1,89 @@
+import atexit
+import collections
 import os
+import queue
+import shutil
 import tempfile
 import subprocess
 import logging
+import mmap
+from contextlib import contextmanager
 from typing import Dict, List, Tuple, Optional
 from pathlib import Path
 
+try:
+    from blake3 import blake3
+
+    CHECKSUM_ALGORITHM = 'blake3'
+
+    def bitstream_checksum(data: bytes) -> str:
+        return blake3(data, max_threads=blake3.AUTO).hexdigest()
+except ImportError:
+    # Fall back to stdlib BLAKE2b, still well ahead of MD5 in software
+    from hashlib import blake2b
+
+    CHECKSUM_ALGORITHM = 'blake2b'
+
+    def bitstream_checksum(data: bytes) -> str:
+        return blake2b(data, digest_size=32).hexdigest()
+
 logger = logging.getLogger(__name__)
 
+# Bitstream file format produced for each family
+BITSTREAM_FORMATS = {
+    'xilinx_7series': 'bit',
+    'lattice_ice40': 'bin',
+    'lattice_ecp5': 'bit'
+}
+
+# Accepted leading 32-bit words per family, with the name used in messages
+BITSTREAM_HEADERS = {
+    'xilinx_7series': ('Xilinx', frozenset({0x000000BB, 0xAA995566})),
+    'lattice_ice40': ('Lattice iCE40', frozenset({0x7EAA997E})),
+    'lattice_ecp5': ('Lattice ECP5', frozenset({0x7EAA997E}))
+}
+
+# Reverse of BITSTREAM_HEADERS: leading word -> families that accept it
+# (iCE40 and ECP5 share the Lattice preamble, so a word may match several)
+BITSTREAM_MAGIC_FAMILIES = {
+    header: tuple(family for family, (_, accepted) in BITSTREAM_HEADERS.items() if header in accepted)
+    for _, headers in BITSTREAM_HEADERS.values() for header in headers
+}
+
+# Packers that can read their input on stdin and write the bitstream to stdout,
+# keyed by family: (required data format, bitstream format, command)
+STREAMING_PACKERS = {
+    'lattice_ice40': ('asc', 'bin', ["icepack"]),
+    'lattice_ecp5': ('config', 'bit', ["ecppack", "--compress", "--input", "/dev/stdin", "--bit", "/dev/stdout"])
+}
+
+# Returned in place of a Xilinx bitstream when F4PGA is not installed
+MOCK_BITSTREAM = bytes(range(8)) * 100
+
+# Executables launched by the packers, resolved on PATH once per service
+PACKER_TOOLS = ('python3', 'icepack', 'ecppack')
+
+# Project X-Ray database used to assemble Xilinx 7-Series bitstreams
+XC7_DATABASE_PATH = Path('/opt/f4pga-arch-defs/xilinx/xc7/database')
+
+# Packer output kept for the response; earlier lines are discarded as they stream
+OUTPUT_TAIL_LINES = 200
+
+def map_bitstream(path: Path):
+    """Map a generated bitstream read-only instead of copying it into memory
+    
+    The mapping stays valid after the working directory is emptied; callers
+    close it once the bitstream has been sent on.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if os.fstat(fd).st_size == 0:
+            # Empty files cannot be mapped
+            return b''
+        return mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+    finally:
+        os.close(fd)
+
 class BitstreamService:
     """Service for FPGA bitstream generation using F4PGA toolchain"""
     
@@ -24,6 +101,60 @@ class BitstreamService:
                 'ecp5': ['lfe5u-25f', 'lfe5u-45f', 'lfe5u-85f']
             }
         }
+        # Flattened per family so validate_device is a single set lookup
+        self._device_index = {
+            family: frozenset(part for parts in devices.values() for part in parts)
+            for family, devices in self.supported_devices.items()
+        }
+        
+        # The toolchain install does not change while the service runs
+        self._f4pga_available = XC7_DATABASE_PATH.is_dir()
+        
+        # Missing tools keep their bare name so launches fail as they did before
+        resolved = {tool: shutil.which(tool) for tool in PACKER_TOOLS}
+        missing = [tool for tool, path in resolved.items() if path is None]
+        if missing:
+            logger.warning(f"Bitstream tools not found on PATH: {', '.join(missing)}")
+        self._tool_paths = {tool: path or tool for tool, path in resolved.items()}
+        
+        # Working directories are reused across calls rather than created and
+        # removed each time; the pool grows to the peak number of concurrent jobs
+        self._workdir_pool = queue.SimpleQueue()
+        self._workdirs: List[Path] = []
+        atexit.register(self._cleanup_workdirs)
+    
+    @contextmanager
+    def _workdir(self):
+        """Borrow an empty working directory from the pool"""
+        try:
+            path = self._workdir_pool.get_nowait()
+        except queue.Empty:
+            path = Path(tempfile.mkdtemp(prefix='bitstream_'))
+            self._workdirs.append(path)
+        try:
+            yield path
+        finally:
+            self._release_workdir(path)
+    
+    def _release_workdir(self, path: Path) -> None:
+        """Empty a working directory and return it to the pool"""
+        try:
+            for entry in os.scandir(path):
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+        except Exception as e:
+            # Don't hand a dirty directory to the next job
+            logger.error(f"Error resetting bitstream working directory: {str(e)}")
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        self._workdir_pool.put(path)
+    
+    def _cleanup_workdirs(self) -> None:
+        """Remove every pooled working directory"""
+        for path in self._workdirs:
+            shutil.rmtree(path, ignore_errors=True)
     
     def generate_bitstream(self, 
                           implementation_data: str,
@@ -45,9 +176,12 @@ class BitstreamService:
             Tuple of (success, output, results_dict)
         """
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
+            # Lattice packers can skip the temp directory entirely
+            streamed = self._pack_streamed(implementation_data, device_family, device_part, data_format)
+            if streamed is not None:
+                return streamed
+            
+            with self._workdir() as temp_path:
                 # Write implementation data
                 if data_format == 'fasm':
                     impl_file = temp_path / f"{top_module}.fasm"
@@ -82,6 +216,50 @@ class BitstreamService:
             logger.error(f"Bitstream generation error: {str(e)}")
             return False, f"Bitstream generation failed: {str(e)}", {}
     
+    def _pack_streamed(self,
+                       implementation_data: str,
+                       device_family: str,
+                       device_part: str,
+                       data_format: str) -> Optional[Tuple[bool, str, Dict]]:
+        """Pack through stdin/stdout, returning None when the packer cannot be launched
+        so the caller falls back to temp files"""
+        packer = STREAMING_PACKERS.get(device_family)
+        if packer is None or packer[0] != data_format:
+            return None
+        
+        _, bitstream_format, (tool, *args) = packer
+        cmd = [self._tool_paths[tool], *args]
+        try:
+            result = subprocess.run(cmd, input=implementation_data.encode(), capture_output=True)
+        except OSError:
+            return None
+        
+        results = {
+            'bitstream_file': None,
+            'bitstream_size': 0,
+            'bitstream_format': bitstream_format,
+            'device_part': device_part,
+            'device_family': device_family
+        }
+        output = result.stderr.decode('utf-8', errors='replace')
+        
+        # A packer that ran but failed would fail the same way on temp files,
+        # so report it rather than running it again
+        if result.returncode != 0 or not result.stdout:
+            return False, output or f"{tool} produced no bitstream", results
+        
+        results['bitstream_file'] = result.stdout
+        results['bitstream_size'] = len(result.stdout)
+        
+        return True, output, results
+    
+    def _run_capturing(self, cmd: List[str], cwd: Path, tail_lines: int = OUTPUT_TAIL_LINES) -> Tuple[int, str]:
+        """Run a packer with stderr merged into stdout, keeping only the last tail_lines lines"""
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, errors='replace', cwd=cwd) as proc:
+            tail = collections.deque(proc.stdout, maxlen=tail_lines)
+        return proc.returncode, ''.join(tail)
+    
     def _generate_xilinx_7series_bitstream(self, 
                                          temp_path: Path, 
                                          top_module: str, 
@@ -92,30 +270,6 @@ class BitstreamService:
             if data_format != 'fasm':
                 return False, "Xilinx 7-Series requires FASM format", {}
             
-            # Check if F4PGA is available, otherwise create mock bitstream
-            f4pga_available = os.path.exists('/opt/f4pga-arch-defs/xilinx/xc7/database')
-            
-            if f4pga_available:
-                # Generate bitstream using Project X-Ray
-                cmd = [
-                    "python3", "-m", "fasm",
-                    "--db-root", f"/opt/f4pga-arch-defs/xilinx/xc7/database",
-                    "--part", device_part,
-                    "--fasm", f"{top_module}.fasm",
-                    "--bit", f"{top_module}.bit"
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, cwd=temp_path)
-            else:
-                # For local testing, create mock bitstream
-                result = subprocess.CompletedProcess(
-                    args=[], returncode=0, stdout="Mock bitstream generation completed", stderr=""
-                )
-                
-                # Create a mock bitstream file
-                mock_bitstream = temp_path / f"{top_module}.bit"
-                mock_bitstream.write_bytes(b'\x00\x01\x02\x03\x04\x05\x06\x07' * 100)  # Mock bitstream data
-            
             # Parse results
             results = {
                 'bitstream_file': None,
@@ -125,14 +279,31 @@ class BitstreamService:
                 'device_family': 'xilinx_7series'
             }
             
+            # Without F4PGA, return a mock bitstream for local testing
+            if not self._f4pga_available:
+                results['bitstream_file'] = MOCK_BITSTREAM
+                results['bitstream_size'] = len(MOCK_BITSTREAM)
+                results['mock'] = True
+                return True, "Mock bitstream generation completed", results
+            
+            # Generate bitstream using Project X-Ray
+            cmd = [
+                self._tool_paths["python3"], "-m", "fasm",
+                "--db-root", str(XC7_DATABASE_PATH),
+                "--part", device_part,
+                "--fasm", f"{top_module}.fasm",
+                "--bit", f"{top_module}.bit"
+            ]
+            
+            returncode, output = self._run_capturing(cmd, temp_path)
+            
             # Read generated bitstream
             bitstream_file = temp_path / f"{top_module}.bit"
             if bitstream_file.exists():
-                results['bitstream_file'] = bitstream_file.read_bytes()
+                results['bitstream_file'] = map_bitstream(bitstream_file)
                 results['bitstream_size'] = len(results['bitstream_file'])
             
-            success = result.returncode == 0
-            output = result.stdout + result.stderr
+            success = returncode == 0
             
             return success, output, results
             
@@ -152,12 +323,12 @@ class BitstreamService:
             
             # Generate bitstream using IceStorm
             cmd = [
-                "icepack",
+                self._tool_paths["icepack"],
                 f"{top_module}.asc",
                 f"{top_module}.bin"
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=temp_path)
+            returncode, output = self._run_capturing(cmd, temp_path)
             
             # Parse results
             results = {
@@ -171,11 +342,10 @@ class BitstreamService:
             # Read generated bitstream
             bitstream_file = temp_path / f"{top_module}.bin"
             if bitstream_file.exists():
-                results['bitstream_file'] = bitstream_file.read_bytes()
+                results['bitstream_file'] = map_bitstream(bitstream_file)
                 results['bitstream_size'] = len(results['bitstream_file'])
             
-            success = result.returncode == 0
-            output = result.stdout + result.stderr
+            success = returncode == 0
             
             return success, output, results
             
@@ -195,13 +365,13 @@ class BitstreamService:
             
             # Generate bitstream using Trellis
             cmd = [
-                "ecppack",
+                self._tool_paths["ecppack"],
                 "--compress",
                 f"{top_module}.config",
                 f"{top_module}.bit"
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=temp_path)
+            returncode, output = self._run_capturing(cmd, temp_path)
             
             # Parse results
             results = {
@@ -215,11 +385,10 @@ class BitstreamService:
             # Read generated bitstream
             bitstream_file = temp_path / f"{top_module}.bit"
             if bitstream_file.exists():
-                results['bitstream_file'] = bitstream_file.read_bytes()
+                results['bitstream_file'] = map_bitstream(bitstream_file)
                 results['bitstream_size'] = len(results['bitstream_file'])
             
-            success = result.returncode == 0
-            output = result.stdout + result.stderr
+            success = returncode == 0
             
             return success, output, results
             
@@ -242,69 +411,27 @@ class BitstreamService:
             if not bitstream_data:
                 return False, "Bitstream data is empty"
             
-            if device_family == 'xilinx_7series':
-                return self._validate_xilinx_bitstream(bitstream_data)
-            elif device_family == 'lattice_ice40':
-                return self._validate_lattice_ice40_bitstream(bitstream_data)
-            elif device_family == 'lattice_ecp5':
-                return self._validate_lattice_ecp5_bitstream(bitstream_data)
-            else:
+            if device_family not in BITSTREAM_HEADERS:
                 return False, f"Unsupported device family: {device_family}"
-                
-        except Exception as e:
-            logger.error(f"Bitstream validation error: {str(e)}")
-            return False, f"Bitstream validation failed: {str(e)}"
-    
-    def _validate_xilinx_bitstream(self, bitstream_data: bytes) -> Tuple[bool, str]:
-        """Validate Xilinx bitstream format"""
-        try:
-            # Check for Xilinx bitstream header
-            if len(bitstream_data) < 4:
-                return False, "Bitstream too short"
             
-            # Xilinx bitstreams typically start with specific patterns
-            header = bitstream_data[:4]
-            if header in [b'\x00\x00\x00\xbb', b'\xaa\x99\x55\x66']:
-                return True, "Valid Xilinx bitstream format"
-            else:
-                return False, "Invalid Xilinx bitstream header"
-                
-        except Exception as e:
-            return False, f"Xilinx bitstream validation error: {str(e)}"
-    
-    def _validate_lattice_ice40_bitstream(self, bitstream_data: bytes) -> Tuple[bool, str]:
-        """Validate Lattice iCE40 bitstream format"""
-        try:
-            # Check for Lattice iCE40 bitstream header
+            name, headers = BITSTREAM_HEADERS[device_family]
             if len(bitstream_data) < 4:
                 return False, "Bitstream too short"
             
-            # Lattice iCE40 bitstreams have specific patterns
-            header = bitstream_data[:4]
-            if header == b'\x7e\xaa\x99\x7e':
-                return True, "Valid Lattice iCE40 bitstream format"
-            else:
-                return False, "Invalid Lattice iCE40 bitstream header"
+            # Compare the first word as an int against the family's known headers
+            if int.from_bytes(bitstream_data[:4], 'big') in headers:
+                return True, f"Valid {name} bitstream format"
+            return False, f"Invalid {name} bitstream header"
                 
         except Exception as e:
-            return False, f"Lattice iCE40 bitstream validation error: {str(e)}"
+            logger.error(f"Bitstream validation error: {str(e)}")
+            return False, f"Bitstream validation failed: {str(e)}"
     
-    def _validate_lattice_ecp5_bitstream(self, bitstream_data: bytes) -> Tuple[bool, str]:
-        """Validate Lattice ECP5 bitstream format"""
-        try:
-            # Check for Lattice ECP5 bitstream header
-            if len(bitstream_data) < 4:
-                return False, "Bitstream too short"
-            
-            # Lattice ECP5 bitstreams have specific patterns
-            header = bitstream_data[:4]
-            if header == b'\x7e\xaa\x99\x7e':
-                return True, "Valid Lattice ECP5 bitstream format"
-            else:
-                return False, "Invalid Lattice ECP5 bitstream header"
-                
-        except Exception as e:
-            return False, f"Lattice ECP5 bitstream validation error: {str(e)}"
+    def detect_bitstream_families(self, bitstream_data: bytes) -> List[str]:
+        """Return the device families whose header matches the bitstream's first word"""
+        if len(bitstream_data) < 4:
+            return []
+        return list(BITSTREAM_MAGIC_FAMILIES.get(int.from_bytes(bitstream_data[:4], 'big'), ()))
     
     def get_bitstream_info(self, bitstream_data: bytes, device_family: str) -> Dict:
         """
@@ -317,41 +444,18 @@ class BitstreamService:
         Returns:
             Dictionary with bitstream information
         """
-        info = {
-            'size_bytes': len(bitstream_data),
-            'size_kb': len(bitstream_data) / 1024,
-            'size_mb': len(bitstream_data) / (1024 * 1024),
+        size_bytes = len(bitstream_data)
+        return {
+            'size_bytes': size_bytes,
+            'size_kb': size_bytes / 1024,
+            'size_mb': size_bytes / (1024 * 1024),
             'device_family': device_family,
-            'format': 'unknown',
-            'checksum': None
+            'format': BITSTREAM_FORMATS.get(device_family, 'unknown'),
+            # Integrity fingerprint only, so a fast non-MD5 hash is fine
+            'checksum': bitstream_checksum(bitstream_data),
+            'checksum_algorithm': CHECKSUM_ALGORITHM
         }
-        
-        try:
-            # Calculate checksum
-            import hashlib
-            info['checksum'] = hashlib.md5(bitstream_data).hexdigest()
-            
-            # Determine format based on device family
-            if device_family == 'xilinx_7series':
-                info['format'] = 'bit'
-            elif device_family == 'lattice_ice40':
-                info['format'] = 'bin'
-            elif device_family == 'lattice_ecp5':
-                info['format'] = 'bit'
-                
-        except Exception as e:
-            logger.warning(f"Failed to get bitstream info: {str(e)}")
-        
-        return info
     
     def validate_device(self, device_family: str, device_part: str) -> bool:
         """Validate if device is supported"""
-        if device_family not in self.supported_devices:
-            return False
-        
-        family_devices = self.supported_devices[device_family]
-        for device_type, parts in family_devices.items():
-            if device_part in parts:
-                return True
-        
-        return False
+        return device_part in self._device_index.get(device_family, ())
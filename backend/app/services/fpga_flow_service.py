@@ -1,31 +1,128 @@
 import os
+import hashlib
+import shutil
+import stat
 import tempfile
 import logging
+import mmap
+import orjson
 from typing import Dict, List, Tuple, Optional
 from pathlib import Path
 
-from .synthesis_service import SynthesisService
-from .implementation_service import ImplementationService
-from .bitstream_service import BitstreamService
-from .programming_service import ProgrammingService
+from . import (
+    get_synthesis_service,
+    get_implementation_service,
+    get_bitstream_service,
+    get_programming_service
+)
+
+try:
+    import zstandard
+
+    # Netlists and FASM are repetitive text, so level 1 shrinks cache entries
+    # several-fold at close to copy speed
+    CACHE_ENTRY_SUFFIX = '.json.zst'
+
+    def _pack_cache_entry(data: bytes) -> bytes:
+        return zstandard.compress(data, level=1)
+
+    def _unpack_cache_entry(data: bytes) -> bytes:
+        return zstandard.decompress(data)
+except ImportError:
+    CACHE_ENTRY_SUFFIX = '.json'
+
+    def _pack_cache_entry(data: bytes) -> bytes:
+        return data
+
+    def _unpack_cache_entry(data: bytes) -> bytes:
+        return data
 
 logger = logging.getLogger(__name__)
 
+# Flow stages in run order: stage -> (stage whose results it consumes, name used in messages)
+FLOW_STAGES = {
+    'synthesis': (None, 'Synthesis'),
+    'implementation': ('synthesis', 'Implementation'),
+    'bitstream_generation': ('implementation', 'Bitstream generation'),
+    'programming': ('bitstream_generation', 'Programming')
+}
+
+# Implementation output handed to bitstream generation, per family:
+# (implementation results key, bitstream data format)
+IMPLEMENTATION_OUTPUTS = {
+    'xilinx_7series': ('fasm_file', 'fasm'),
+    'lattice_ice40': ('asc_file', 'asc'),
+    'lattice_ecp5': ('config_file', 'config')
+}
+
+# Successful stage results are kept on disk keyed by the stage inputs and the
+# toolchain, since the tools are deterministic and synthesis alone can take minutes.
+# Cached bitstreams may be programmed as-is, so the directory must be private.
+FLOW_CACHE_DIR = Path(
+    os.getenv('FLOW_CACHE_DIR')
+    or Path(os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache') / 'fpga_flow'
+)
+FLOW_CACHE_MAX = int(os.getenv('FLOW_CACHE_MAX', '256'))
+CACHED_STAGES = frozenset({'synthesis', 'implementation', 'bitstream_generation'})
+
+# Toolchain whose install state is folded into the cache keys, so installing or
+# upgrading a tool invalidates the results it would now produce differently
+TOOLCHAIN_EXECUTABLES = ('yosys', 'nextpnr-xilinx', 'nextpnr-ice40', 'nextpnr-ecp5', 'icepack', 'ecppack', 'python3')
+F4PGA_ROOT = Path('/opt/f4pga-arch-defs')
+
+def toolchain_fingerprint() -> str:
+    """Identify the installed toolchain by path, size and mtime of each piece"""
+    parts = []
+    for name, path in [(tool, shutil.which(tool)) for tool in TOOLCHAIN_EXECUTABLES] + [('f4pga', F4PGA_ROOT)]:
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+        parts.append(f"{name}={path}:{st.st_size}:{st.st_mtime_ns}" if st else f"{name}=")
+    return ';'.join(parts)
+
+class MissingStageInput(Exception):
+    """A stage's dependency finished without producing what the stage consumes"""
+
 class FPGAFlowService:
     """Service for complete FPGA design flow orchestration"""
     
     def __init__(self):
-        self.synthesis_service = SynthesisService()
-        self.implementation_service = ImplementationService()
-        self.bitstream_service = BitstreamService()
-        self.programming_service = ProgrammingService()
+        self.synthesis_service = get_synthesis_service()
+        self.implementation_service = get_implementation_service()
+        self.bitstream_service = get_bitstream_service()
+        self.programming_service = get_programming_service()
         
-        self.flow_stages = [
-            'synthesis',
-            'implementation', 
-            'bitstream_generation',
-            'programming'
-        ]
+        # Devices each stage's service supports, so a flow only checks the
+        # stages it will actually run
+        stage_services = {
+            'synthesis': self.synthesis_service,
+            'implementation': self.implementation_service,
+            'bitstream_generation': self.bitstream_service,
+            'programming': self.programming_service
+        }
+        self._stage_devices = {
+            stage: frozenset(
+                (family, part)
+                for family, devices in service.supported_devices.items()
+                for parts in devices.values()
+                for part in parts
+            )
+            for stage, service in stage_services.items()
+        }
+        
+        self._cache_enabled = self._prepare_cache_dir()
+        self._toolchain = toolchain_fingerprint()
+        
+        self.flow_stages = list(FLOW_STAGES)
+        # stage -> (pulls the stage's inputs from the flow and its dependency's results,
+        #           runs the stage on those inputs)
+        self._stages = {
+            'synthesis': (self._synthesis_inputs, self.synthesis_service.synthesize_design),
+            'implementation': (self._implementation_inputs, self.implementation_service.implement_design),
+            'bitstream_generation': (self._bitstream_inputs, self._generate_bitstream),
+            'programming': (self._programming_inputs, self._program)
+        }
     
     def run_complete_flow(self, 
                          verilog_code: str,
@@ -34,7 +131,8 @@ class FPGAFlowService:
                          device_part: str,
                          constraints: Optional[str] = None,
                          stages: Optional[List[str]] = None,
-                         program_fpga: bool = False) -> Tuple[bool, str, Dict]:
+                         program_fpga: bool = False,
+                         incremental: bool = False) -> Tuple[bool, str, Dict]:
         """
         Run complete FPGA design flow
         
@@ -46,21 +144,29 @@ class FPGAFlowService:
             constraints: Optional constraint file content
             stages: List of stages to run (default: all)
             program_fpga: Whether to program the FPGA
+            incremental: Reuse results of stages whose inputs match an earlier incremental run
             
         Returns:
             Tuple of (success, output, results_dict)
         """
         try:
-            if stages is None:
-                stages = self.flow_stages.copy()
-            
-            if program_fpga and 'programming' not in stages:
-                stages.append('programming')
+            # A set for the per-stage membership checks; also leaves the caller's list untouched
+            stages = frozenset(self.flow_stages if stages is None else stages)
+            if program_fpga:
+                stages |= {'programming'}
             
             # Validate device
-            if not self._validate_device(device_family, device_part):
+            if not self._validate_device(device_family, device_part, stages):
                 return False, f"Unsupported device: {device_family}/{device_part}", {}
             
+            flow = {
+                'verilog_code': verilog_code,
+                'top_module': top_module,
+                'device_family': device_family,
+                'device_part': device_part,
+                'constraints': constraints
+            }
+            
             results = {
                 'stages_completed': [],
                 'stages_failed': [],
@@ -71,120 +177,47 @@ class FPGAFlowService:
                 'stage_results': {}
             }
             
-            # Stage 1: Synthesis
-            if 'synthesis' in stages:
-                logger.info("Starting synthesis stage")
-                success, output, synth_results = self.synthesis_service.synthesize_design(
-                    verilog_code, top_module, device_family, device_part, constraints
-                )
-                
-                results['stage_results']['synthesis'] = {
-                    'success': success,
-                    'output': output,
-                    'results': synth_results
-                }
-                
-                if success:
-                    results['stages_completed'].append('synthesis')
-                    logger.info("Synthesis completed successfully")
-                else:
-                    results['stages_failed'].append('synthesis')
-                    logger.error(f"Synthesis failed: {output}")
-                    return False, f"Synthesis failed: {output}", results
+            stage_results = results['stage_results']
+            completed = results['stages_completed']
+            failed = results['stages_failed']
             
-            # Stage 2: Implementation
-            if 'implementation' in stages:
-                logger.info("Starting implementation stage")
-                
-                # Get netlist from synthesis
-                if 'synthesis' not in results['stage_results']:
-                    return False, "Implementation requires synthesis to be completed first", results
-                
-                netlist_json = results['stage_results']['synthesis']['results'].get('netlist_json')
-                if not netlist_json:
-                    return False, "No netlist available from synthesis", results
-                
-                success, output, impl_results = self.implementation_service.implement_design(
-                    netlist_json, top_module, device_family, device_part, constraints
-                )
-                
-                results['stage_results']['implementation'] = {
-                    'success': success,
-                    'output': output,
-                    'results': impl_results
-                }
-                
-                if success:
-                    results['stages_completed'].append('implementation')
-                    logger.info("Implementation completed successfully")
-                else:
-                    results['stages_failed'].append('implementation')
-                    logger.error(f"Implementation failed: {output}")
-                    return False, f"Implementation failed: {output}", results
+            # Attached to stage log records for the JSON log formatter
+            log_fields = {"top_module": top_module, "device_family": device_family, "device_part": device_part}
             
-            # Stage 3: Bitstream Generation
-            if 'bitstream_generation' in stages:
-                logger.info("Starting bitstream generation stage")
-                
-                # Get implementation data
-                if 'implementation' not in results['stage_results']:
-                    return False, "Bitstream generation requires implementation to be completed first", results
-                
-                impl_data = self._get_implementation_data(results['stage_results']['implementation']['results'], device_family)
-                if not impl_data:
-                    return False, "No implementation data available", results
-                
-                data_format = self._get_data_format(device_family)
-                success, output, bitstream_results = self.bitstream_service.generate_bitstream(
-                    impl_data, top_module, device_family, device_part, data_format
-                )
-                
-                results['stage_results']['bitstream_generation'] = {
-                    'success': success,
-                    'output': output,
-                    'results': bitstream_results
-                }
+            # Walk the stages in dependency order, each consuming its predecessor's results
+            for stage, (dependency, name) in FLOW_STAGES.items():
+                if stage not in stages:
+                    continue
                 
-                if success:
-                    results['stages_completed'].append('bitstream_generation')
-                    logger.info("Bitstream generation completed successfully")
-                else:
-                    results['stages_failed'].append('bitstream_generation')
-                    logger.error(f"Bitstream generation failed: {output}")
-                    return False, f"Bitstream generation failed: {output}", results
-            
-            # Stage 4: Programming
-            if 'programming' in stages:
-                logger.info("Starting programming stage")
+                logger.info("Starting %s stage", name.lower(), extra={**log_fields, "stage": stage})
                 
-                # Get bitstream data
-                if 'bitstream_generation' not in results['stage_results']:
-                    return False, "Programming requires bitstream generation to be completed first", results
+                dependency_results = None
+                if dependency is not None:
+                    if dependency not in stage_results:
+                        return False, f"{name} requires {FLOW_STAGES[dependency][1].lower()} to be completed first", results
+                    dependency_results = stage_results[dependency]['results']
                 
-                bitstream_data = results['stage_results']['bitstream_generation']['results'].get('bitstream_file')
-                if not bitstream_data:
-                    return False, "No bitstream data available", results
+                inputs_for, _ = self._stages[stage]
+                try:
+                    inputs = inputs_for(flow, dependency_results)
+                except MissingStageInput as e:
+                    return False, str(e), results
                 
-                success, output, prog_results = self.programming_service.program_fpga(
-                    bitstream_data, device_family, device_part, verify=True
-                )
+                stage_result = self._run_stage(stage, inputs, incremental)
                 
-                results['stage_results']['programming'] = {
-                    'success': success,
-                    'output': output,
-                    'results': prog_results
-                }
+                stage_results[stage] = stage_result
+                output = stage_result['output']
                 
-                if success:
-                    results['stages_completed'].append('programming')
-                    logger.info("Programming completed successfully")
+                if stage_result['success']:
+                    completed.append(stage)
+                    logger.info("%s completed successfully", name, extra={**log_fields, "stage": stage})
                 else:
-                    results['stages_failed'].append('programming')
-                    logger.error(f"Programming failed: {output}")
-                    return False, f"Programming failed: {output}", results
+                    failed.append(stage)
+                    logger.error("%s failed: %s", name, output, extra={**log_fields, "stage": stage})
+                    return False, f"{name} failed: {output}", results
             
             # Determine overall success
-            results['overall_success'] = len(results['stages_failed']) == 0
+            results['overall_success'] = not failed
             
             # Generate summary output
             summary_output = self._generate_flow_summary(results)
@@ -192,7 +225,7 @@ class FPGAFlowService:
             return results['overall_success'], summary_output, results
             
         except Exception as e:
-            logger.error(f"FPGA flow error: {str(e)}")
+            logger.error("FPGA flow error: %s", e)
             return False, f"FPGA flow failed: {str(e)}", {}
     
     def run_synthesis_only(self, 
@@ -200,11 +233,12 @@ class FPGAFlowService:
                           top_module: str,
                           device_family: str,
                           device_part: str,
-                          constraints: Optional[str] = None) -> Tuple[bool, str, Dict]:
+                          constraints: Optional[str] = None,
+                          incremental: bool = False) -> Tuple[bool, str, Dict]:
         """Run synthesis stage only"""
         return self.run_complete_flow(
             verilog_code, top_module, device_family, device_part, 
-            constraints, stages=['synthesis']
+            constraints, stages=['synthesis'], incremental=incremental
         )
     
     def run_implementation_only(self, 
@@ -212,12 +246,14 @@ class FPGAFlowService:
                                top_module: str,
                                device_family: str,
                                device_part: str,
-                               constraints: Optional[str] = None) -> Tuple[bool, str, Dict]:
+                               constraints: Optional[str] = None,
+                               incremental: bool = False) -> Tuple[bool, str, Dict]:
         """Run implementation stage only"""
         try:
-            success, output, results = self.implementation_service.implement_design(
-                netlist_json, top_module, device_family, device_part, constraints
+            stage_result = self._run_stage(
+                'implementation', (netlist_json, top_module, device_family, device_part, constraints), incremental
             )
+            success, output, results = stage_result['success'], stage_result['output'], stage_result['results']
             
             flow_results = {
                 'stages_completed': ['implementation'] if success else [],
@@ -238,7 +274,7 @@ class FPGAFlowService:
             return success, output, flow_results
             
         except Exception as e:
-            logger.error(f"Implementation only error: {str(e)}")
+            logger.error("Implementation only error: %s", e)
             return False, f"Implementation failed: {str(e)}", {}
     
     def run_bitstream_only(self, 
@@ -246,12 +282,14 @@ class FPGAFlowService:
                           top_module: str,
                           device_family: str,
                           device_part: str,
-                          data_format: str = 'fasm') -> Tuple[bool, str, Dict]:
+                          data_format: str = 'fasm',
+                          incremental: bool = False) -> Tuple[bool, str, Dict]:
         """Run bitstream generation stage only"""
         try:
-            success, output, results = self.bitstream_service.generate_bitstream(
-                implementation_data, top_module, device_family, device_part, data_format
+            stage_result = self._run_stage(
+                'bitstream_generation', (implementation_data, top_module, device_family, device_part, data_format), incremental
             )
+            success, output, results = stage_result['success'], stage_result['output'], stage_result['results']
             
             flow_results = {
                 'stages_completed': ['bitstream_generation'] if success else [],
@@ -272,7 +310,7 @@ class FPGAFlowService:
             return success, output, flow_results
             
         except Exception as e:
-            logger.error(f"Bitstream generation only error: {str(e)}")
+            logger.error("Bitstream generation only error: %s", e)
             return False, f"Bitstream generation failed: {str(e)}", {}
     
     def detect_fpga_devices(self) -> Tuple[bool, str, List[Dict]]:
@@ -288,50 +326,202 @@ class FPGAFlowService:
             'programming': self.programming_service.supported_devices
         }
     
-    def _validate_device(self, device_family: str, device_part: str) -> bool:
-        """Validate device across all services"""
-        return (self.synthesis_service.validate_device(device_family, device_part) and
-                self.implementation_service.validate_device(device_family, device_part) and
-                self.bitstream_service.validate_device(device_family, device_part) and
-                self.programming_service.validate_device(device_family, device_part))
+    def _validate_device(self, device_family: str, device_part: str, stages=FLOW_STAGES) -> bool:
+        """Validate device against the services of the given stages (default: all)"""
+        device = (device_family, device_part)
+        return all(
+            device in devices
+            for stage, devices in self._stage_devices.items() if stage in stages
+        )
     
     def _get_implementation_data(self, impl_results: Dict, device_family: str) -> Optional[str]:
         """Get implementation data based on device family"""
-        if device_family == 'xilinx_7series':
-            return impl_results.get('fasm_file')
-        elif device_family == 'lattice_ice40':
-            return impl_results.get('asc_file')
-        elif device_family == 'lattice_ecp5':
-            return impl_results.get('config_file')
-        return None
+        output = IMPLEMENTATION_OUTPUTS.get(device_family)
+        return impl_results.get(output[0]) if output else None
     
     def _get_data_format(self, device_family: str) -> str:
         """Get data format based on device family"""
-        if device_family == 'xilinx_7series':
-            return 'fasm'
-        elif device_family == 'lattice_ice40':
-            return 'asc'
-        elif device_family == 'lattice_ecp5':
-            return 'config'
-        return 'unknown'
+        output = IMPLEMENTATION_OUTPUTS.get(device_family)
+        return output[1] if output else 'unknown'
+    
+    def _run_stage(self, stage: str, inputs: Tuple, incremental: bool = False) -> Dict:
+        """Run a flow stage on its inputs; incremental runs reuse and record results by input hash"""
+        cache_key = None
+        if incremental and stage in CACHED_STAGES and self._cache_enabled:
+            # Inputs are all text for cached stages; NUL keeps the fields apart
+            cache_key = hashlib.blake2b(
+                '\0'.join((stage, self._toolchain, *(value or '' for value in inputs))).encode(),
+                digest_size=16
+            ).hexdigest()
+            stage_result = self._load_cached_stage(cache_key, stage)
+            if stage_result is not None:
+                logger.info("Using cached %s results", stage, extra={"stage": stage, "cache_key": cache_key})
+                return stage_result
+        
+        # A stage that raises is recorded as failed like any other, so the flow
+        # still reports the stages that ran before it
+        _, run = self._stages[stage]
+        try:
+            success, output, stage_results = run(*inputs)
+        except Exception as e:
+            logger.exception("%s stage raised", stage, extra={"stage": stage})
+            success, output, stage_results = False, f"{stage} stage error: {str(e)}", {}
+        
+        stage_result = {
+            'success': success,
+            'output': output,
+            'results': stage_results
+        }
+        # Mock results stand in for a missing toolchain and must not outlive it
+        if success and cache_key is not None and not stage_results.get('mock'):
+            self._save_cached_stage(cache_key, stage, stage_result)
+        return stage_result
+    
+    def _synthesis_inputs(self, flow: Dict, _: Optional[Dict]) -> Tuple:
+        """Synthesis stage: Verilog source to netlist"""
+        return (
+            flow['verilog_code'], flow['top_module'], flow['device_family'],
+            flow['device_part'], flow['constraints']
+        )
+    
+    def _implementation_inputs(self, flow: Dict, synth_results: Dict) -> Tuple:
+        """Implementation stage: netlist to placed and routed design"""
+        netlist_json = synth_results.get('netlist_json')
+        if not netlist_json:
+            raise MissingStageInput("No netlist available from synthesis")
+        
+        return (
+            netlist_json, flow['top_module'], flow['device_family'],
+            flow['device_part'], flow['constraints']
+        )
+    
+    def _bitstream_inputs(self, flow: Dict, impl_results: Dict) -> Tuple:
+        """Bitstream stage: routed design to bitstream bytes"""
+        device_family = flow['device_family']
+        impl_data = self._get_implementation_data(impl_results, device_family)
+        if not impl_data:
+            raise MissingStageInput("No implementation data available")
+        
+        return (
+            impl_data, flow['top_module'], device_family,
+            flow['device_part'], self._get_data_format(device_family)
+        )
+    
+    def _programming_inputs(self, flow: Dict, bitstream_results: Dict) -> Tuple:
+        """Programming stage: load the bitstream onto the device"""
+        bitstream_data = bitstream_results.get('bitstream_file')
+        if not bitstream_data:
+            raise MissingStageInput("No bitstream data available")
+        
+        return bitstream_data, flow['device_family'], flow['device_part']
+    
+    def _generate_bitstream(self, *args) -> Tuple[bool, str, Dict]:
+        """generate_bitstream, with the result copied out of its mapping"""
+        success, output, results = self.bitstream_service.generate_bitstream(*args)
+        self._materialize_bitstream(results)
+        return success, output, results
+    
+    def _program(self, bitstream_data: bytes, device_family: str, device_part: str) -> Tuple[bool, str, Dict]:
+        """program_fpga, always verifying after a flow"""
+        return self.programming_service.program_fpga(
+            bitstream_data, device_family, device_part, verify=True
+        )
+    
+    def _prepare_cache_dir(self) -> bool:
+        """Create FLOW_CACHE_DIR owner-only, refusing one that others can write to"""
+        try:
+            FLOW_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            st = os.lstat(FLOW_CACHE_DIR)
+            if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o022:
+                logger.warning("Flow cache disabled: %s is not a private directory", FLOW_CACHE_DIR)
+                return False
+            if st.st_mode & 0o077:
+                os.chmod(FLOW_CACHE_DIR, 0o700)
+            return True
+        except OSError as e:
+            logger.warning("Flow cache disabled: %s", e)
+            return False
+    
+    def _load_cached_stage(self, cache_key: str, stage: str) -> Optional[Dict]:
+        """Return a cached stage result, or None on a miss"""
+        entry_dir = FLOW_CACHE_DIR / cache_key
+        try:
+            with open(entry_dir / f"{stage}{CACHE_ENTRY_SUFFIX}", 'rb') as f:
+                stage_result = orjson.loads(_unpack_cache_entry(f.read()))
+            if stage == 'bitstream_generation':
+                # The bitstream is binary, so it is stored next to the JSON
+                bitstream_file = entry_dir / 'bitstream.bin'
+                if bitstream_file.exists():
+                    stage_result['results']['bitstream_file'] = bitstream_file.read_bytes()
+            return stage_result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Ignoring unreadable flow cache entry %s/%s: %s", cache_key, stage, e)
+            return None
+    
+    def _save_cached_stage(self, cache_key: str, stage: str, stage_result: Dict) -> None:
+        """Store a successful stage result, evicting the oldest entries beyond FLOW_CACHE_MAX"""
+        entry_dir = FLOW_CACHE_DIR / cache_key
+        try:
+            is_new = not entry_dir.exists()
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            
+            stage_results = dict(stage_result['results'])
+            bitstream_file = stage_results.pop('bitstream_file', None)
+            if bitstream_file is not None:
+                self._write_atomic(entry_dir / 'bitstream.bin', bitstream_file)
+            self._write_atomic(
+                entry_dir / f"{stage}{CACHE_ENTRY_SUFFIX}",
+                _pack_cache_entry(orjson.dumps({**stage_result, 'results': stage_results}))
+            )
+            
+            if is_new:
+                self._evict_cached_flows()
+        except Exception as e:
+            logger.warning("Failed to cache %s results: %s", stage, e)
+    
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        """Write through a temp file so concurrent readers never see a partial entry"""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _evict_cached_flows(self) -> None:
+        """Remove the oldest cache entries beyond FLOW_CACHE_MAX"""
+        with os.scandir(FLOW_CACHE_DIR) as entries:
+            cached = [
+                (entry.stat(follow_symlinks=False).st_mtime, entry.path)
+                for entry in entries if entry.is_dir(follow_symlinks=False)
+            ]
+        if len(cached) > FLOW_CACHE_MAX:
+            cached.sort()
+            for _, path in cached[:len(cached) - FLOW_CACHE_MAX]:
+                shutil.rmtree(path, ignore_errors=True)
+    
+    def _materialize_bitstream(self, bitstream_results: Dict) -> None:
+        """Copy a mapped bitstream into bytes, since flow results are serialized whole"""
+        bitstream_file = bitstream_results.get('bitstream_file')
+        if isinstance(bitstream_file, mmap.mmap):
+            bitstream_results['bitstream_file'] = bitstream_file[:]
+            bitstream_file.close()
     
     def _generate_flow_summary(self, results: Dict) -> str:
         """Generate summary of the flow execution"""
-        summary = []
-        summary.append("=== FPGA Design Flow Summary ===")
-        summary.append(f"Device: {results['device_family']}/{results['device_part']}")
-        summary.append(f"Top Module: {results['top_module']}")
-        summary.append(f"Overall Success: {results['overall_success']}")
-        summary.append("")
-        
-        summary.append("Stages Completed:")
-        for stage in results['stages_completed']:
-            summary.append(f"  ✓ {stage}")
+        summary = [
+            "=== FPGA Design Flow Summary ===",
+            f"Device: {results['device_family']}/{results['device_part']}",
+            f"Top Module: {results['top_module']}",
+            f"Overall Success: {results['overall_success']}",
+            "",
+            "Stages Completed:"
+        ]
+        summary.extend(f"  ✓ {stage}" for stage in results['stages_completed'])
         
         if results['stages_failed']:
             summary.append("Stages Failed:")
-            for stage in results['stages_failed']:
-                summary.append(f"  ✗ {stage}")
+            summary.extend(f"  ✗ {stage}" for stage in results['stages_failed'])
         
         summary.append("")
         
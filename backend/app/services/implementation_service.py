@@ -25,6 +25,11 @@ class ImplementationService:
                 'ecp5': ['lfe5u-25f', 'lfe5u-45f', 'lfe5u-85f']
             }
         }
+        # Flattened per family so validate_device is a single set lookup
+        self._device_index = {
+            family: frozenset(part for parts in devices.values() for part in parts)
+            for family, devices in self.supported_devices.items()
+        }
     
     def implement_design(self, 
                         netlist_json: str,
@@ -135,6 +140,7 @@ stat
                 return False, result.stdout + result.stderr, {}
             
             # Run nextpnr-xilinx for place & route (if available)
+            mock = False
             if f4pga_available and os.path.exists(f"/opt/f4pga-arch-defs/xilinx/xc7/chipdb/{device_part}.bin"):
                 nextpnr_cmd = [
                     "nextpnr-xilinx",
@@ -150,6 +156,7 @@ stat
                 nextpnr_result = subprocess.run(nextpnr_cmd, capture_output=True, text=True, cwd=temp_path)
             else:
                 # For local testing, create mock implementation results
+                mock = True
                 nextpnr_result = subprocess.CompletedProcess(
                     args=[], returncode=0, stdout="Mock implementation completed", stderr=""
                 )
@@ -175,6 +182,8 @@ stat
                 'device_part': device_part,
                 'device_family': 'xilinx_7series'
             }
+            if mock:
+                results['mock'] = True
             
             # Read generated files
             routed_json_file = temp_path / f"{top_module}_routed.json"
@@ -449,12 +458,4 @@ stat
     
     def validate_device(self, device_family: str, device_part: str) -> bool:
         """Validate if device is supported"""
-        if device_family not in self.supported_devices:
-            return False
-        
-        family_devices = self.supported_devices[device_family]
-        for device_type, parts in family_devices.items():
-            if device_part in parts:
-                return True
-        
-        return False
+        return device_part in self._device_index.get(device_family, ())
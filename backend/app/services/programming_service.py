@@ -2,11 +2,18 @@ import os
 import tempfile
 import subprocess
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# File extension openFPGALoader expects for each family's bitstream
+BITSTREAM_SUFFIXES = {
+    'xilinx_7series': '.bit',
+    'lattice_ice40': '.bin',
+    'lattice_ecp5': '.bit'
+}
+
 class ProgrammingService:
     """Service for FPGA programming using openFPGALoader"""
     
@@ -24,6 +31,11 @@ class ProgrammingService:
                 'ecp5': ['lfe5u-25f', 'lfe5u-45f', 'lfe5u-85f']
             }
         }
+        # Flattened per family so validate_device is a single set lookup
+        self._device_index = {
+            family: frozenset(part for parts in devices.values() for part in parts)
+            for family, devices in self.supported_devices.items()
+        }
     
     def detect_fpga_devices(self) -> Tuple[bool, str, List[Dict]]:
         """
@@ -48,7 +60,7 @@ class ProgrammingService:
             return False, f"Device detection failed: {str(e)}", []
     
     def program_fpga(self, 
-                    bitstream_data: bytes,
+                    bitstream_data: Union[bytes, bytearray, memoryview],
                     device_family: str, 
                     device_part: str,
                     programming_mode: str = 'auto',
@@ -57,7 +69,7 @@ class ProgrammingService:
         Program FPGA with bitstream
         
         Args:
-            bitstream_data: Bitstream binary data
+            bitstream_data: Bitstream binary data, any buffer-protocol object
             device_family: FPGA device family
             device_part: Specific device part
             programming_mode: Programming mode ('auto', 'jtag', 'spi', 'qspi')
@@ -71,17 +83,13 @@ class ProgrammingService:
                 temp_path = Path(temp_dir)
                 
                 # Determine bitstream file extension
-                if device_family == 'xilinx_7series':
-                    bitstream_file = temp_path / "design.bit"
-                elif device_family == 'lattice_ice40':
-                    bitstream_file = temp_path / "design.bin"
-                elif device_family == 'lattice_ecp5':
-                    bitstream_file = temp_path / "design.bit"
-                else:
+                if device_family not in BITSTREAM_SUFFIXES:
                     return False, f"Unsupported device family: {device_family}", {}
+                bitstream_file = temp_path / f"design{BITSTREAM_SUFFIXES[device_family]}"
                 
-                # Write bitstream to file
-                bitstream_file.write_bytes(bitstream_data)
+                # Write bitstream to file straight from the caller's buffer
+                with open(bitstream_file, 'wb') as f:
+                    f.write(bitstream_data)
                 
                 # Program FPGA
                 success, output, results = self._program_device(
@@ -94,6 +102,31 @@ class ProgrammingService:
             logger.error(f"FPGA programming error: {str(e)}")
             return False, f"FPGA programming failed: {str(e)}", {}
     
+    def program_fpga_from_path(self,
+                               bitstream_file: Path,
+                               device_family: str,
+                               device_part: str,
+                               programming_mode: str = 'auto',
+                               verify: bool = True) -> Tuple[bool, str, Dict]:
+        """
+        Program FPGA with a bitstream already written to disk
+        
+        The file should carry the extension from BITSTREAM_SUFFIXES so
+        openFPGALoader can tell the format.
+        
+        Returns:
+            Tuple of (success, output, results_dict)
+        """
+        try:
+            if device_family not in BITSTREAM_SUFFIXES:
+                return False, f"Unsupported device family: {device_family}", {}
+            return self._program_device(
+                Path(bitstream_file), device_family, device_part, programming_mode, verify
+            )
+        except Exception as e:
+            logger.error(f"FPGA programming error: {str(e)}")
+            return False, f"FPGA programming failed: {str(e)}", {}
+    
     def _program_device(self, 
                        bitstream_file: Path, 
                        device_family: str, 
@@ -270,15 +303,7 @@ class ProgrammingService:
     
     def validate_device(self, device_family: str, device_part: str) -> bool:
         """Validate if device is supported"""
-        if device_family not in self.supported_devices:
-            return False
-        
-        family_devices = self.supported_devices[device_family]
-        for device_type, parts in family_devices.items():
-            if device_part in parts:
-                return True
-        
-        return False
+        return device_part in self._device_index.get(device_family, ())
     
     def get_supported_programming_modes(self, device_family: str) -> List[str]:
         """Get supported programming modes for device family"""
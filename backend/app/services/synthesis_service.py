@@ -25,6 +25,11 @@ class SynthesisService:
                 'ecp5': ['lfe5u-25f', 'lfe5u-45f', 'lfe5u-85f']
             }
         }
+        # Flattened per family so validate_device is a single set lookup
+        self._device_index = {
+            family: frozenset(part for parts in devices.values() for part in parts)
+            for family, devices in self.supported_devices.items()
+        }
     
     def get_supported_devices(self) -> Dict:
         """Get list of supported FPGA devices"""
@@ -323,12 +328,4 @@ stat
     
     def validate_device(self, device_family: str, device_part: str) -> bool:
         """Validate if device is supported"""
-        if device_family not in self.supported_devices:
-            return False
-        
-        family_devices = self.supported_devices[device_family]
-        for device_type, parts in family_devices.items():
-            if device_part in parts:
-                return True
-        
-        return False
+        return device_part in self._device_index.get(device_family, ())
@@ -20,22 +20,23 @@ class VerilogSimulator:
         self.simulation_timeout = 10  # Reduced to 10 seconds to match Vercel's timeout
         self.check_required_tools()
         
+    # Set once the toolchain has been found, so later instances skip the lookup
+    _tools_available = False
+
     def check_required_tools(self):
         """Check if required tools are available"""
-        required_tools = ["iverilog", "vvp"]
-        missing_tools = []
+        if VerilogSimulator._tools_available:
+            return
         
-        for tool in required_tools:
-            try:
-                subprocess.run(["which", tool], check=True, capture_output=True)
-            except subprocess.CalledProcessError:
-                missing_tools.append(tool)
+        required_tools = ["iverilog", "vvp"]
+        missing_tools = [tool for tool in required_tools if shutil.which(tool) is None]
                 
         if missing_tools:
             error_msg = f"Required tools not found: {', '.join(missing_tools)}"
             logger.error(error_msg)
             raise RuntimeError(error_msg)
             
+        VerilogSimulator._tools_available = True
         logger.debug("All required tools are available")
 
     def extract_module_names(self, verilog_code: str) -> List[str]:
@@ -44,14 +45,31 @@ class VerilogSimulator:
         module_pattern = r'module\s+(\w+)\s*(?:\([^)]*\))?\s*;'
         return re.findall(module_pattern, verilog_code)
 
+    async def _run_tool(self, cmd: List[str], cwd: str) -> subprocess.CompletedProcess:
+        """Run a toolchain command without blocking the event loop, killing it on timeout"""
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.simulation_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise subprocess.TimeoutExpired(cmd, self.simulation_timeout)
+        return subprocess.CompletedProcess(
+            cmd,
+            process.returncode,
+            stdout.decode('utf-8', errors='replace'),
+            stderr.decode('utf-8', errors='replace')
+        )
+
     async def compile_and_simulate(self, verilog_code: str, testbench_code: str, top_module: str, top_testbench: str = None) -> Tuple[bool, str, str]:
-        """Compile and simulate Verilog code."""
-        temp_dir = None
+        """Compile and simulate Verilog code in the instance work dir; reset() empties it for reuse."""
+        temp_dir = self.temp_dir
         try:
-            # Create a temporary directory for the simulation files
-            temp_dir = tempfile.mkdtemp()
-            logger.debug(f"Created temporary directory: {temp_dir}")
-            
             # Create temporary files for the design and testbench
             design_path = os.path.join(temp_dir, "design.v")
             testbench_path = os.path.join(temp_dir, "testbench.v")
@@ -74,13 +92,7 @@ class VerilogSimulator:
             
             output = ""
             try:
-                compile_result = subprocess.run(
-                    compile_cmd,
-                    capture_output=True,
-                    text=True,
-                    cwd=temp_dir,
-                    timeout=self.simulation_timeout
-                )
+                compile_result = await self._run_tool(compile_cmd, temp_dir)
                 # Add detailed logging of iverilog output
                 logger.debug("=== iverilog Compilation Output ===")
                 logger.debug(f"Command: {' '.join(compile_cmd)}")
@@ -144,13 +156,7 @@ class VerilogSimulator:
             logger.debug(f"Simulation command: {' '.join(sim_cmd)}")
             
             try:
-                sim_result = subprocess.run(
-                    sim_cmd,
-                    capture_output=True,
-                    text=True,
-                    cwd=temp_dir,
-                    timeout=self.simulation_timeout
-                )
+                sim_result = await self._run_tool(sim_cmd, temp_dir)
                 
                 # Always append both stdout and stderr to output
                 output += (sim_result.stdout or "")
@@ -218,13 +224,6 @@ class VerilogSimulator:
         except Exception as e:
             logger.error(f"Error in compile_and_simulate: {str(e)}")
             return False, f"Error: {str(e)}", ""
-        finally:
-            # Clean up temporary files
-            if temp_dir and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir)
-                except Exception as e:
-                    logger.error(f"Error cleaning up temporary directory: {str(e)}")
 
     def prepare_testbench(self, testbench_code: str, top_module: str, top_testbench: str = None) -> str:
         """Prepare the testbench code by ensuring proper VCD dumping."""
@@ -266,6 +265,19 @@ end
         
         return modified_testbench
 
+    def reset(self):
+        """Empty the working directory so the instance can be reused"""
+        # Recreate the directory if something (e.g. a /tmp cleaner) removed it
+        os.makedirs(self.temp_dir, exist_ok=True)
+        for entry in os.scandir(self.temp_dir):
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+            except Exception as e:
+                logger.error(f"Error resetting temporary directory: {str(e)}")
+
     def cleanup(self):
         """Clean up temporary files"""
         logger.debug(f"Cleaning up temporary directory: {self.temp_dir}")
@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# Production entrypoint: one Uvicorn worker per core under Gunicorn, with the
+# app imported once in the master (--preload) and shared copy-on-write.
+# Use `python -m uvicorn app.main:app --reload` for local development.
+exec gunicorn app.main:app -k uvicorn.workers.UvicornWorker \
+     -w "${WEB_CONCURRENCY:-$(nproc)}" --preload \
+     --bind "${HOST:-0.0.0.0}:${PORT:-8001}" \
+     --access-logfile /dev/null --error-logfile -
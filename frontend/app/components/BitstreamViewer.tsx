@@ -42,6 +42,7 @@ interface BitstreamInfo {
   device_family: string;
   format: string;
   checksum: string;
+  checksum_algorithm: string;
 }
 
 export default function BitstreamViewer({ 
@@ -392,7 +393,7 @@ export default function BitstreamViewer({
                       </div>
                     </div>
                     <div className="bg-[#1e1e1e] rounded p-3">
-                      <div className="text-xs text-gray-500 mb-1">MD5 Checksum</div>
+                      <div className="text-xs text-gray-500 mb-1">Checksum ({bitstreamInfo.checksum_algorithm.toUpperCase()})</div>
                       <div className="text-xs font-mono text-gray-300 break-all">
                         {bitstreamInfo.checksum}
                       </div>